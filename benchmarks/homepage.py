@@ -0,0 +1,143 @@
+"""
+Home page extraction: `HomePage` (regular expressions) against the former BeautifulSoup path.
+
+Both parse the same document and extract the fields the bootstrap needs
+(site verification, `ondemand.s` hash, `loading-x-anim` frames, migration url and form).
+Pass a saved x.com home page, or a synthetic page of the same shape is generated.
+
+    python benchmarks/homepage.py saved_home_page.html --runs 20
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from tweety.homepage import HomePage  # noqa: E402
+from tweety.utils import MIGRATION_REGEX  # noqa: E402
+from tweety.transaction import ON_DEMAND_FILE_REGEX  # noqa: E402
+
+
+def make_page(size=1024 * 1024):
+    rng = random.Random(0)
+
+    def path():
+        return "M 10,30 " + " ".join(
+            "C {},{} {},{} {},{}".format(*[rng.randint(0, 255) for _ in range(6)]) for _ in range(16)
+        )
+
+    frames = "".join(
+        f'<svg id="loading-x-anim-{i}" width="0" height="0"><g><path d="{path()}"></path>'
+        f'<path d="{path()}"></path></g></svg>'
+        for i in range(4)
+    )
+    head = (
+        '<!DOCTYPE html><html dir="ltr" lang="en"><head>'
+        '<meta charset="utf-8" /><meta name="viewport" content="width=device-width,initial-scale=1" />'
+        '<meta name="twitter-site-verification" content="' + "".join(rng.choice("abcdefABCDEF0123456789+/") for _ in range(64)) + '" />'
+        '<meta http-equiv="origin-trial" content="token" /></head><body>' + frames
+    )
+    chunk = (
+        '<div class="css-175oi2r r-1awozwy" data-testid="cell"><span class="css-1jxf684">text</span></div>'
+        '<script nonce="abc">window.__SCRIPTS_LOADED__ = window.__SCRIPTS_LOADED__ || {};</script>'
+    )
+    tail = '<script>{"ondemand.s":"' + "%08x" % rng.getrandbits(32) + '","ondemand.t":"abc"}</script></body></html>'
+    body = chunk * max((size - len(head) - len(tail)) // len(chunk), 0)
+    return (head + body + tail).encode()
+
+
+def extract_home_page(content):
+    home_page = HomePage(content)
+
+    return dict(
+        verification_key=home_page.verification_key,
+        on_demand_hash=home_page.on_demand_hash,
+        animation_frames=home_page.animation_frames,
+        migration_url=home_page.migration_url,
+        migration_form=home_page.migration_form
+    )
+
+
+def extract_bs4(content):
+    import bs4
+
+    # Same lookups as get_home_html and TransactionGenerator did before HomePage
+    document = bs4.BeautifulSoup(content, "lxml")
+    element = document.select_one("[name='twitter-site-verification']")
+    on_demand_file = ON_DEMAND_FILE_REGEX.search(str(document))
+    frames = document.select("[id^='loading-x-anim']")
+
+    refresh = document.select_one("meta[http-equiv='refresh']")
+    migration_url = MIGRATION_REGEX.search(str(refresh)) or MIGRATION_REGEX.search(str(content))
+    form = document.select_one("form[name='f']") or document.select_one("form[action='https://x.com/x/migrate']")
+
+    return dict(
+        verification_key=element.get("content") if element else None,
+        on_demand_hash=on_demand_file.group(1) if on_demand_file else None,
+        animation_frames=[list(list(frame.children)[0].children)[1].get("d") for frame in frames],
+        migration_url=migration_url.group(0) if migration_url else None,
+        migration_form=dict(
+            action=form.attrs.get("action", "https://x.com/x/migrate"),
+            method=form.attrs.get("method", "POST"),
+            data={field.get("name"): field.get("value") for field in form.select("input")}
+        ) if form else None
+    )
+
+
+def measure(extract, content, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = extract(content)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    extract(content)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return result, statistics.median(timings), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", nargs="?", help="Saved home page, a synthetic ~1 MB page is used if omitted")
+    parser.add_argument("--runs", type=int, default=20, help="Parses timed per extractor, the median is reported")
+    args = parser.parse_args()
+
+    if args.path:
+        with open(args.path, "rb") as f:
+            content = f.read()
+    else:
+        content = make_page()
+
+    print(f"document: {len(content) / 1024:.0f} KiB, {args.runs} runs")
+    results = {}
+
+    for name, extract in (("HomePage", extract_home_page), ("BeautifulSoup", extract_bs4)):
+        try:
+            result, median, peak = measure(extract, content, args.runs)
+        except ImportError as error:
+            print(f"  {name:<14} skipped ({error.name} is not installed)")
+            continue
+
+        results[name] = (result, median)
+        print(f"  {name:<14} {median * 1000:8.1f} ms median  {peak / 1024 / 1024:8.1f} MiB peak")
+
+    if len(results) == 2:
+        (home_page, home_page_time), (soup, soup_time) = results["HomePage"], results["BeautifulSoup"]
+        print(f"speedup: {soup_time / home_page_time:.1f}x")
+
+        mismatched = [key for key in home_page if home_page[key] != soup[key]]
+        if mismatched:
+            print(f"FAIL: fields differ between the extractors: {', '.join(mismatched)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
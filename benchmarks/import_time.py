@@ -0,0 +1,84 @@
+"""
+Import-time budget of `import tweety`.
+
+Runs `python -X importtime -c "import tweety"` in fresh interpreters and fails
+if the cumulative import time of `tweety` goes over the budget, or if one of the
+optional dependencies which should be imported on first use is imported eagerly.
+
+    python benchmarks/import_time.py --budget-ms 300
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# Deferred to first use, importing any of them with `import tweety` is a regression
+LAZY_MODULES = ("openpyxl", "bs4", "lxml", "dateutil", "magic", "capsolver", "anticaptchaofficial", "twocaptcha")
+
+
+def measure():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC_DIR, env.get("PYTHONPATH")]))
+
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import tweety"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    modules = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        self_time, cumulative, name = line[len("import time:"):].split("|")
+        if not self_time.strip().isdigit():
+            # Header line
+            continue
+
+        modules[name.strip()] = (int(self_time), int(cumulative))
+
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=300, help="Maximum cumulative import time of tweety")
+    parser.add_argument("--runs", type=int, default=5, help="Interpreters started, the fastest one is kept")
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules printed")
+    args = parser.parse_args()
+
+    # Fastest run is the least disturbed by the machine, the budget is checked against it
+    runs = [measure() for _ in range(max(args.runs, 1))]
+    modules = min(runs, key=lambda run: run["tweety"][1])
+    total_ms = modules["tweety"][1] / 1000
+
+    print(f"import tweety: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms, best of {len(runs)})")
+    print("slowest modules (self time):")
+    for name, (self_time, cumulative) in sorted(modules.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"  {self_time / 1000:8.1f} ms  {cumulative / 1000:8.1f} ms cumulative  {name}")
+
+    eager = sorted(name for name in modules if name.split(".")[0] in LAZY_MODULES)
+    errors = []
+
+    if eager:
+        errors.append(f"imported eagerly: {', '.join(eager)}")
+
+    if total_ms > args.budget_ms:
+        errors.append(f"import time {total_ms:.1f} ms is over the budget of {args.budget_ms:.0f} ms")
+
+    if errors:
+        for error in errors:
+            print(f"FAIL: {error}", file=sys.stderr)
+        sys.exit(1)
+
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
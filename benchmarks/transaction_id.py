@@ -0,0 +1,106 @@
+"""
+Transaction id generation: the precomputed per-key state against the former implementation.
+
+Both generate ids for the same key, animation key, paths and random bytes,
+the outputs are checked to be identical before they are timed.
+
+    python benchmarks/transaction_id.py --number 100000
+"""
+
+import argparse
+import base64
+import hashlib
+import math
+import os
+import random
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from tweety.transaction import TransactionGenerator  # noqa: E402
+from tweety.utils import base64_encode  # noqa: E402
+
+PATHS = (
+    ("GET", "/i/api/graphql/oUZZZ8Oddwxs8Cd3iW3UEA/UserByScreenName"),
+    ("GET", "/i/api/graphql/E3opETHurmVJflFsUBVuUQ/UserTweets"),
+    ("POST", "/i/api/graphql/a1p9RWpkYKBjWv_I3WzS-A/CreateTweet"),
+)
+
+
+def generate_baseline(generator, method, path, time_now=None):
+    # generate_transaction_id before the per-key state was precomputed
+    time_now = time_now or math.floor((time.time() * 1000 - 1682924400 * 1000) / 1000)
+    time_now_bytes = [(time_now >> (i * 8)) & 0xFF for i in range(4)]
+    key_bytes = list(base64.b64decode(bytes(generator.key, 'utf-8')))
+    hash_val = hashlib.sha256(
+        f"{method}!{path}!{time_now}{generator.DEFAULT_KEYWORD}{generator.animation_key}".encode()).digest()
+    hash_bytes = list(hash_val)
+    random_num = random.randint(0, 255)
+    bytes_arr = [*key_bytes, *time_now_bytes, *hash_bytes[:16], generator.ADDITIONAL_RANDOM_NUMBER]
+    out = bytearray([random_num, *[item ^ random_num for item in bytes_arr]])
+    return base64_encode(out).strip("=")
+
+
+def generate_current(generator, method, path, time_now=None):
+    return generator.generate_transaction_id(method, path, time_now=time_now)
+
+
+def make_generator():
+    rng = random.Random(0)
+
+    return TransactionGenerator(None, state={
+        "row_index": 2,
+        "key_bytes_indices": [12, 14, 7],
+        "key": base64.b64encode(bytes(rng.getrandbits(8) for _ in range(48))).decode(),
+        "animation_key": "".join(rng.choice("0123456789abcdef") for _ in range(40))
+    })
+
+
+def check(generator):
+    randint = random.randint
+
+    try:
+        # Every random byte selects its own XOR table, all of them are compared
+        for random_num in range(256):
+            random.randint = lambda a, b: random_num
+            method, path = PATHS[random_num % len(PATHS)]
+            time_now = 80000000 + random_num
+
+            expected = generate_baseline(generator, method, path, time_now)
+            actual = generate_current(generator, method, path, time_now)
+
+            if expected != actual:
+                raise AssertionError(f"ids differ for {method} {path}: {expected} != {actual}")
+    finally:
+        random.randint = randint
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=100000, help="Ids generated per timing")
+    parser.add_argument("--repeat", type=int, default=5, help="Timings per implementation, the fastest is reported")
+    args = parser.parse_args()
+
+    generator = make_generator()
+    check(generator)
+
+    print(f"{args.number} ids, best of {args.repeat}")
+    timings = {}
+
+    for name, generate in (("before", generate_baseline), ("after", generate_current)):
+        def run():
+            for index in range(args.number):
+                method, path = PATHS[index % len(PATHS)]
+                generate(generator, method, path)
+
+        best = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        timings[name] = best
+        print(f"  {name:<7} {best:8.3f} s  {best / args.number * 1e6:8.2f} us/id")
+
+    print(f"speedup: {timings['before'] / timings['after']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,11 @@ from .updates import UpdateMethods
 from .auth import AuthMethods
 from .user import UserMethods
 from .utils import get_running_loop
+from .pool import AccountPool
+from .proxy import ProxyPool
+from .concurrency import ConcurrencyController
+from .download import DownloadEngine, MediaDownloader
+from .hls import HLSDownloader
 
 
 def SyncWrap(cls):
@@ -19,8 +19,9 @@ class AuthMethods:
             return
 
         self.request.cookies = self.session.cookies_dict()
+        self.request.load_bootstrap_state(getattr(self.session, "bootstrap", None))
         self.user = await self.request.verify_cookies()
-        await self.session.save_session(self.cookies, self.user)
+        await self.session.save_session(self.cookies, self.user, self.request.get_bootstrap_state())
         self.is_user_authorized = True
         return self.user
 
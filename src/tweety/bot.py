@@ -11,7 +11,9 @@ from .types import (Proxy, TweetComments, UserTweets, Search, User, Tweet, Trend
 from .exceptions import *
 from .session import Session, MemorySession, FileSession
 from .http import Request
+from .proxy import ProxyPool
 from .captcha.base import BaseCaptchaSolver
+from .tracing import BaseTracer, CallbackTracer
 from .filters import TweetCommentFilters
 
 
@@ -21,7 +23,7 @@ class BotMethods:
     def __init__(
             self,
             session_name: Union[str, Session],
-            proxy: Union[httpxProxy, Proxy, str] = None,
+            proxy: Union[httpxProxy, Proxy, str, ProxyPool] = None,
             captcha_solver: Type[BaseCaptchaSolver] = None,
             **httpx_kwargs
     ):
@@ -29,7 +31,7 @@ class BotMethods:
         Constructor of the Twitter Public class
 
         :param: session_name: (`str`, `Session`) This is the name of the session which will be saved and can be loaded later
-        :param: proxy: (`ProxyTypes` or `None`) Provide the proxy you want to use while making a request
+        :param: proxy: (`ProxyTypes`, `ProxyPool` or `None`) Provide the proxy you want to use while making a request
         :param: captcha_solver: (`BaseCaptchaSolver`) Provide the instance of captcha solver class
                                 which has two mandatory methods named `unlock`, `__call__`.
                                 - both mandatory methods should accept at least one argument
@@ -126,6 +128,21 @@ class BotMethods:
     @property
     def cache(self):
         return self._cached_users
+
+    def add_tracer(self, tracer: BaseTracer = None, on_start=None, on_end=None):
+        """
+        Add a tracer which receives the spans of the requests and of the page parsing
+
+        :param tracer: (`BaseTracer`) Tracer with `on_start` and `on_end` methods
+        :param on_start: (`Callable[[Span], None]`) Called when a span starts, if `tracer` isn't provided
+        :param on_end: (`Callable[[Span], None]`) Called when a span ends, if `tracer` isn't provided
+        :return: BaseTracer
+        """
+
+        return self.request.tracing.add_tracer(tracer or CallbackTracer(on_start, on_end))
+
+    def remove_tracer(self, tracer: BaseTracer):
+        self.request.tracing.remove_tracer(tracer)
     
     async def get_user_id(self, username: str):
         return await self._get_user_id(username)
@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_TTLS = {
+    "UserByScreenName": 300,
+    "UsersByRestIds": 300,
+    "TweetDetail": 60,
+    "TweetResultByRestId": 300,
+    "ListByRestId": 600,
+    "CommunitiesFetchOneQuery": 600,
+}
+
+
+class BaseCacheBackend:
+    """
+    Storage of the cached responses, values are JSON serializable objects
+    """
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl, endpoint=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(BaseCacheBackend):
+    def __init__(self, max_size=1024):
+        """
+        :param max_size: (`int`) Number of responses to keep, least recently used are evicted first
+        """
+
+        self.max_size = max_size
+        self._data = OrderedDict()
+
+    def get(self, key):
+        item = self._data.get(key)
+
+        if item is None:
+            return None
+
+        expires, value = item
+        if expires <= time.time():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl, endpoint=None):
+        self._data[key] = (time.time() + ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCacheBackend(BaseCacheBackend):
+    def __init__(self, path="tweety_cache.sqlite3", max_size=100000):
+        """
+        :param path: (`str`) Path of the SQLite database file
+        :param max_size: (`int`) Number of responses to keep, least recently used are evicted first
+        """
+
+        self.path = os.path.abspath(path)
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # Access times of the hits, written with the next write instead of committing on every read
+        self._accessed = {}
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, endpoint TEXT, value TEXT, expires REAL, accessed REAL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._connection.commit()
+
+    def get(self, key):
+        now = time.time()
+
+        with self._lock:
+            row = self._connection.execute("SELECT value, expires FROM responses WHERE key = ?", (key,)).fetchone()
+
+            if row is None or row[1] <= now:
+                # Expired rows are deleted by the next write
+                return None
+
+            self._accessed[key] = now
+
+        return json.loads(row[0])
+
+    def _flush_accessed(self):
+        if self._accessed:
+            self._connection.executemany(
+                "UPDATE responses SET accessed = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._accessed.items()]
+            )
+            self._accessed = {}
+
+    def set(self, key, value, ttl, endpoint=None):
+        now = time.time()
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, endpoint, value, expires, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, endpoint, json.dumps(value, separators=(",", ":")), now + ttl, now)
+            )
+            self._accessed.pop(key, None)
+            self._flush_accessed()
+            self._evict()
+            self._connection.commit()
+
+    def _evict(self):
+        self._connection.execute("DELETE FROM responses WHERE expires <= ?", (time.time(),))
+        count = self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+        if count > self.max_size:
+            self._connection.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed ASC LIMIT ?)",
+                (count - self.max_size,)
+            )
+
+    def delete(self, key):
+        with self._lock:
+            self._accessed.pop(key, None)
+            self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._connection.commit()
+
+    def clear(self):
+        with self._lock:
+            self._accessed = {}
+            self._connection.execute("DELETE FROM responses")
+            self._connection.commit()
+
+    def flush(self):
+        with self._lock:
+            self._flush_accessed()
+            self._connection.commit()
+
+    def close(self):
+        self.flush()
+        self._connection.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class ResponseCache:
+    """
+    Opt-in cache of the idempotent GraphQL reads, each endpoint has its own TTL
+    """
+
+    def __init__(self, backend=None, ttls=None):
+        """
+        :param backend: (`BaseCacheBackend`) Storage of the responses, defaults to `MemoryCacheBackend`
+        :param ttls: (`dict`) TTL in seconds per endpoint, merged into `DEFAULT_CACHE_TTLS`.
+                        Set the TTL of an endpoint to `0` or `None` to stop caching it
+        """
+
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttls = dict(DEFAULT_CACHE_TTLS)
+        self.ttls.update(ttls or {})
+        self._stats = {}
+
+    def is_cacheable(self, endpoint):
+        return bool(self.ttls.get(endpoint))
+
+    @staticmethod
+    def get_key(endpoint, url, params, identity):
+        params = sorted((str(k), str(v)) for k, v in (params or {}).items())
+        raw_key = json.dumps([endpoint, url, params, identity], separators=(",", ":"), default=str)
+        return f"{endpoint}:{hashlib.sha1(raw_key.encode()).hexdigest()}"
+
+    def _get_stats(self, endpoint):
+        stats = self._stats.get(endpoint)
+
+        if stats is None:
+            stats = self._stats[endpoint] = {"hits": 0, "misses": 0}
+
+        return stats
+
+    def get(self, endpoint, key):
+        value = self.backend.get(key)
+        self._get_stats(endpoint)["hits" if value is not None else "misses"] += 1
+        return value
+
+    def set(self, endpoint, key, value):
+        ttl = self.ttls.get(endpoint)
+
+        if ttl:
+            self.backend.set(key, value, ttl, endpoint)
+
+    def clear(self):
+        self.backend.clear()
+
+    @property
+    def stats(self):
+        hits = sum(i["hits"] for i in self._stats.values())
+        misses = sum(i["misses"] for i in self._stats.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "size": len(self.backend),
+            "endpoints": {endpoint: dict(stats) for endpoint, stats in self._stats.items()}
+        }
+
+    def reset_stats(self):
+        self._stats = {}
+
+    def __repr__(self):
+        return "ResponseCache(backend={}, size={})".format(self.backend.__class__.__name__, len(self.backend))
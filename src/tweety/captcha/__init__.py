@@ -1,3 +1,21 @@
-from .capsolver import CapSolver
-from .anticaptcha import AntiCaptcha
-from .two_captcha import TwoCaptcha
\ No newline at end of file
+import importlib
+
+# Solvers are imported on first use, they pull in their third-party SDKs
+_SOLVERS = {
+    "CapSolver": ".capsolver",
+    "AntiCaptcha": ".anticaptcha",
+    "TwoCaptcha": ".two_captcha",
+}
+
+
+def __getattr__(name):
+    if name in _SOLVERS:
+        solver = getattr(importlib.import_module(_SOLVERS[name], __name__), name)
+        globals()[name] = solver
+        return solver
+
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_SOLVERS))
@@ -0,0 +1,179 @@
+import base64
+import gzip
+import json
+import os
+import threading
+import httpx
+
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+REDACTED_HEADERS = ("authorization", "cookie", "x-csrf-token", "x-guest-token", "set-cookie")
+
+
+class CassetteError(Exception):
+    """
+    Raised when a request has no recorded response in replay mode
+    """
+
+
+class Cassette:
+    """
+    Record the http traffic of a client to a compact file (JSON lines, gzipped if path ends with `.gz`)
+    and replay it later without any network
+    """
+
+    def __init__(self, path, mode=MODE_REPLAY, redact_headers=REDACTED_HEADERS):
+        """
+        :param path: (`str`) Path of the cassette file
+        :param mode: (`str`) `record` or `replay`
+        :param redact_headers: (`tuple`) Headers whose values aren't written to the cassette,
+                                `set-cookie` keeps the names and attributes of the cookies
+        """
+
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"Cassette mode should be '{MODE_RECORD}' or '{MODE_REPLAY}' not '{mode}'")
+
+        self.path = os.path.abspath(path)
+        self.mode = mode
+        self.redact_headers = tuple(i.lower() for i in redact_headers)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._positions = {}
+
+        if self.mode == MODE_REPLAY:
+            self.load()
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+
+    @property
+    def is_recording(self):
+        return self.mode == MODE_RECORD
+
+    def _open(self, mode):
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, mode + "t", encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    @staticmethod
+    def _get_key(method, url):
+        return f"{str(method).upper()} {url}"
+
+    def load(self):
+        self._entries, self._positions = {}, {}
+
+        if not os.path.exists(self.path):
+            raise CassetteError(f"Cassette '{self.path}' doesn't exist")
+
+        with self._open("r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+
+                entry = json.loads(line)
+                self._entries.setdefault(self._get_key(entry["method"], entry["url"]), []).append(entry)
+
+    def __len__(self):
+        return sum(len(i) for i in self._entries.values())
+
+    def _redact_header(self, name, value):
+        name = name.lower()
+
+        if name not in self.redact_headers:
+            return value
+
+        if name == "set-cookie":
+            # Replayed cookies keep their name and attributes, only the value is hidden
+            cookie, separator, attributes = value.partition(";")
+            return cookie.split("=", 1)[0] + "=<redacted>" + separator + attributes
+
+        return "<redacted>"
+
+    def record(self, request, response, content):
+        entry = {
+            "method": request.method,
+            "url": str(request.url),
+            "headers": [[k, self._redact_header(k, v)] for k, v in request.headers.multi_items()],
+            "status": response.status_code,
+            "response_headers": [[k, self._redact_header(k, v)] for k, v in response.headers.multi_items()],
+            "http_version": response.extensions.get("http_version", b"HTTP/1.1").decode(),
+            "body": base64.b64encode(content).decode()
+        }
+
+        with self._lock:
+            self._entries.setdefault(self._get_key(entry["method"], entry["url"]), []).append(entry)
+            with self._open("a") as f:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def play(self, request):
+        key = self._get_key(request.method, str(request.url))
+
+        with self._lock:
+            entries = self._entries.get(key)
+
+            if not entries:
+                raise CassetteError(f"No recorded response for '{key}'")
+
+            # Same request recorded many times is replayed in order, the last one is repeated afterwards
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            entry = entries[min(position, len(entries) - 1)]
+
+        return httpx.Response(
+            status_code=entry["status"],
+            headers=entry["response_headers"],
+            content=base64.b64decode(entry["body"]),
+            extensions={"http_version": entry.get("http_version", "HTTP/1.1").encode()},
+            request=request
+        )
+
+    def rewind(self):
+        self._positions = {}
+
+    def get_transport(self, transport=None, **transport_kwargs):
+        """
+        Get the async transport for `httpx.AsyncClient`
+
+        :param transport: (`httpx.AsyncBaseTransport`) Transport which sends the requests in record mode
+        :param transport_kwargs: Keyword arguments of `httpx.AsyncHTTPTransport` if no transport is provided
+        :return: CassetteTransport
+        """
+
+        if self.is_recording and transport is None:
+            transport = httpx.AsyncHTTPTransport(**transport_kwargs)
+
+        return CassetteTransport(self, transport)
+
+    def __repr__(self):
+        return "Cassette(path={}, mode={}, entries={})".format(self.path, self.mode, len(self))
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    def __init__(self, cassette, transport=None):
+        self.cassette = cassette
+        self._transport = transport
+
+    async def handle_async_request(self, request):
+        if not self.cassette.is_recording:
+            return self.cassette.play(request)
+
+        response = await self._transport.handle_async_request(request)
+
+        try:
+            # Bytes as they came on the wire, they still match the content-encoding and content-length headers
+            content = b"".join([chunk async for chunk in response.stream])
+        finally:
+            await response.aclose()
+
+        self.cassette.record(request, response, content)
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            content=content,
+            extensions=response.extensions,
+            request=request
+        )
+
+    async def aclose(self):
+        if self._transport is not None:
+            await self._transport.aclose()
+
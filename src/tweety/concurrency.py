@@ -0,0 +1,266 @@
+import asyncio
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+HOST_API = "api"
+HOST_WEB = "web"
+HOST_UPLOAD = "upload"
+HOST_MEDIA = "media"
+HOST_OTHER = "other"
+ACCOUNT = "account"
+
+HOST_GROUPS = {
+    "api.x.com": HOST_API,
+    "api.twitter.com": HOST_API,
+    "x.com": HOST_WEB,
+    "twitter.com": HOST_WEB,
+    "upload.x.com": HOST_UPLOAD,
+    "upload.twitter.com": HOST_UPLOAD,
+    "video.twimg.com": HOST_MEDIA,
+    "pbs.twimg.com": HOST_MEDIA,
+    "abs.twimg.com": HOST_MEDIA,
+    "ton.twitter.com": HOST_MEDIA,
+    "ton.x.com": HOST_MEDIA,
+}
+
+# Paths of x.com (and twitter.com) served by the API
+API_PATH_PREFIXES = ("/i/api/", "/1.1/", "/2/")
+
+# Limits start low so a burst (i.e. gather of hundreds of calls) doesn't flood one HTTP/2 connection,
+# and grow while the hosts keep up. Ceilings of the api and the account are the connection pool
+# of httpx (100), the only bound before. Web is only the bootstrap (API paths are routed to api),
+# uploads are bound by the bandwidth more than by the requests in flight
+DEFAULT_MAX_CONNECTIONS = 100
+
+DEFAULT_LIMITS = {
+    HOST_API: dict(initial=16, max_limit=DEFAULT_MAX_CONNECTIONS),
+    HOST_WEB: dict(initial=4, max_limit=32),
+    HOST_UPLOAD: dict(initial=4, max_limit=16),
+    HOST_MEDIA: dict(initial=8, max_limit=64),
+    HOST_OTHER: dict(initial=8, max_limit=32),
+    ACCOUNT: dict(initial=16, max_limit=DEFAULT_MAX_CONNECTIONS),
+}
+
+
+class AIMDLimiter:
+    """
+    Concurrency limit which grows by `increase` per window of successful requests
+    and is multiplied by `decrease` on throttling, errors or latency going above its baseline
+    """
+
+    def __init__(
+            self,
+            initial=8,
+            min_limit=1,
+            max_limit=64,
+            increase=1.0,
+            decrease=0.5,
+            latency_tolerance=2.5,
+            name=None
+    ):
+        """
+        :param initial: (`int`) Starting limit
+        :param min_limit: (`int`) Limit never goes below it
+        :param max_limit: (`int`) Limit never goes above it
+        :param increase: (`float`) Limit added after a full window of successful requests
+        :param decrease: (`float`) Factor the limit is multiplied with on congestion
+        :param latency_tolerance: (`float`) Latency above baseline times this is considered congestion, `None` to ignore latency
+        :param name: (`str`) Name of the limiter
+        """
+
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.limit = float(max(min(initial, max_limit), min_limit))
+        self.in_flight = 0
+        self.baseline = None
+        self._last_decrease = 0.0
+        self._waiters = deque()
+
+    @property
+    def available(self):
+        return max(int(self.limit) - self.in_flight, 0)
+
+    def _wake_up(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(True)
+
+    async def acquire(self):
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+
+        try:
+            await waiter
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over while being cancelled, give it to the next one
+                self.in_flight -= 1
+                self._wake_up()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self, latency=None, status_code=None, error=False):
+        """
+        Release the slot and adapt the limit from the outcome of the request,
+        limit is left as it is if nothing is known about the outcome
+
+        :param latency: (`float`) Seconds the request took
+        :param status_code: (`int`) Status code of the response
+        :param error: (`bool`) Request failed with a transport error
+        """
+
+        self.in_flight = max(self.in_flight - 1, 0)
+
+        if error or status_code in (429, 503):
+            self._on_congestion()
+        elif latency is not None and self._is_slow(latency):
+            self._on_congestion()
+        elif status_code is not None and status_code < 500:
+            self.limit = min(self.limit + self.increase / max(self.limit, 1.0), float(self.max_limit))
+
+        self._wake_up()
+
+    def _is_slow(self, latency):
+        if self.latency_tolerance is None:
+            return False
+
+        if self.baseline is None:
+            self.baseline = latency
+            return False
+
+        slow = latency > self.baseline * self.latency_tolerance
+
+        # Baseline follows the fast responses quickly and the slow ones slowly
+        alpha = 0.3 if latency < self.baseline else 0.02
+        self.baseline += alpha * (latency - self.baseline)
+        return slow
+
+    def _on_congestion(self):
+        now = time.monotonic()
+
+        # Requests of the same burst fail together, the limit is cut once per window
+        window = self.baseline if self.baseline else 1.0
+        if now - self._last_decrease < window:
+            return
+
+        self._last_decrease = now
+        self.limit = max(self.limit * self.decrease, float(self.min_limit))
+
+    def to_dict(self):
+        return dict(
+            name=self.name,
+            limit=round(self.limit, 2),
+            in_flight=self.in_flight,
+            waiting=len(self._waiters),
+            baseline=round(self.baseline, 4) if self.baseline is not None else None
+        )
+
+    def __repr__(self):
+        return "AIMDLimiter(name={}, limit={}, in_flight={})".format(self.name, round(self.limit, 2), self.in_flight)
+
+
+class ConcurrencyController:
+    """
+    Bounds the requests in flight of a client, per host group (api, web, upload, media)
+    and for the whole account
+    """
+
+    def __init__(self, limits=None, enabled=True):
+        """
+        :param limits: (`dict`) Keyword arguments of `AIMDLimiter` per group, merged into `DEFAULT_LIMITS`.
+                        Groups are `api`, `web`, `upload`, `media`, `other` and `account`.
+                        Defaults start at 16 requests in flight for the api and the account,
+                        and grow by one per window of healthy requests up to 100
+        :param enabled: (`bool`) Don't limit anything if False
+        """
+
+        self.enabled = enabled
+        self._limits = {group: dict(limit) for group, limit in DEFAULT_LIMITS.items()}
+
+        for group, limit in (limits or {}).items():
+            self._limits.setdefault(group, {}).update(limit)
+
+        self._limiters = {group: AIMDLimiter(name=group, **limit) for group, limit in self._limits.items()}
+
+    @property
+    def limiters(self):
+        return self._limiters
+
+    @staticmethod
+    def get_group(url):
+        parsed = urlparse(str(url))
+        host = (parsed.hostname or "").lower()
+
+        if host in HOST_GROUPS:
+            group = HOST_GROUPS[host]
+
+            # Most of the API is served by x.com itself
+            if group == HOST_WEB and parsed.path.startswith(API_PATH_PREFIXES):
+                return HOST_API
+
+            return group
+
+        if host.endswith(".twimg.com"):
+            return HOST_MEDIA
+
+        return HOST_OTHER
+
+    def get_limiters(self, url, account=True):
+        limiters = [self._limiters[self.get_group(url)]]
+
+        if account:
+            limiters.append(self._limiters[ACCOUNT])
+
+        return limiters
+
+    async def acquire(self, url, account=True):
+        """
+        Wait for a slot of the host group of the url (and of the account)
+
+        :param url: (`str`) Url of the request
+        :param account: (`bool`) Count the request towards the account limit too
+        :return: list[AIMDLimiter] (to be passed to `release`)
+        """
+
+        if not self.enabled:
+            return []
+
+        acquired = []
+        try:
+            # Always in the same order, so two requests never hold each other's slot
+            for limiter in self.get_limiters(url, account):
+                await limiter.acquire()
+                acquired.append(limiter)
+        except BaseException:
+            for limiter in acquired:
+                limiter.in_flight = max(limiter.in_flight - 1, 0)
+                limiter._wake_up()
+            raise
+
+        return acquired
+
+    @staticmethod
+    def release(limiters, latency=None, status_code=None, error=False):
+        for limiter in limiters:
+            limiter.release(latency, status_code, error)
+
+    def to_dict(self):
+        return {group: limiter.to_dict() for group, limiter in self._limiters.items()}
+
+    def __repr__(self):
+        return "ConcurrencyController({})".format(
+            ", ".join(f"{group}={round(limiter.limit, 2)}" for group, limiter in self._limiters.items())
+        )
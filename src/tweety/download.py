@@ -0,0 +1,596 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import os
+import time
+import warnings
+import httpx
+
+PART_SUFFIX = ".part"
+STATE_SUFFIX = ".state"
+
+
+class DownloadEngine:
+    """
+    Downloads media to files, resuming the partial files with `Range` requests
+    and splitting the large ones into byte range segments downloaded in parallel.
+    File writes run in threads so the event loop never blocks on the disk
+    """
+
+    def __init__(
+            self,
+            session,
+            concurrency=None,
+            chunk_size=65536,
+            segments=4,
+            min_segment_size=4 * 1024 * 1024,
+            resume=True,
+            retries=3,
+            timeout=600
+    ):
+        """
+        :param session: (`httpx.AsyncClient`) Client used for the downloads
+        :param concurrency: (`ConcurrencyController`) Limits the connections to the media hosts
+        :param chunk_size: (`int`) Bytes read from the network per write
+        :param segments: (`int`) Maximum number of parallel segments of a single file, `1` to disable segmenting
+        :param min_segment_size: (`int`) Files are only split if every segment gets at least these many bytes
+        :param resume: (`bool`) Resume partial files left by an interrupted download
+        :param retries: (`int`) Times a broken stream is resumed before giving up
+        :param timeout: (`int`) Timeout of a download request in seconds
+        """
+
+        self._session = session
+        self._concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.segments = max(int(segments), 1)
+        self.min_segment_size = min_segment_size
+        self.resume = resume
+        self.retries = retries
+        self.timeout = timeout
+
+    async def _acquire(self, url):
+        if self._concurrency is None:
+            return []
+
+        return await self._concurrency.acquire(url, account=False)
+
+    def _release(self, limiters, status_code=None, error=False):
+        if self._concurrency is not None:
+            self._concurrency.release(limiters, status_code=status_code, error=error)
+
+    @staticmethod
+    async def _report(progress_callback, filename, total_size, downloaded):
+        if not progress_callback:
+            return
+
+        if inspect.iscoroutinefunction(progress_callback):
+            await progress_callback(filename, total_size, downloaded)
+        else:
+            progress_callback(filename, total_size, downloaded)
+
+    async def download(self, url, filename, headers=None, progress_callback=None):
+        """
+        Download the url to the file
+
+        :param url: (`str`) Url of the media
+        :param filename: (`str`) Path of the file
+        :param headers: (`dict`) Headers of the requests
+        :param progress_callback: (`Callable[[str, int, int], None]`) Called with filename, total size and downloaded bytes
+        :return: str (filename)
+        """
+
+        headers = dict(headers or {})
+        part_path = filename + PART_SUFFIX
+        state = self._load_state(part_path + STATE_SUFFIX)
+
+        if state and os.path.exists(part_path):
+            total_size = state["total_size"]
+        else:
+            total_size = await self._download_stream(url, filename, part_path, headers, progress_callback)
+
+        if total_size:
+            await self._download_segments(url, filename, part_path, headers, total_size, progress_callback)
+
+        os.replace(part_path, filename)
+        return filename
+
+    def _get_segments(self, total_size):
+        if not total_size or self.segments < 2:
+            return []
+
+        count = min(self.segments, total_size // max(self.min_segment_size, 1))
+        if count < 2:
+            return []
+
+        segment_size = -(-total_size // count)
+        return [[start, min(start + segment_size, total_size) - 1] for start in range(0, total_size, segment_size)]
+
+    async def _download_stream(self, url, filename, part_path, headers, progress_callback):
+        """
+        Download the url as a single stream, resuming the partial file if there is one.
+        Returns the size of the media instead if it's worth downloading in segments
+        """
+
+        offset = os.path.getsize(part_path) if self.resume and os.path.exists(part_path) else 0
+        attempts = 0
+
+        while True:
+            request_headers = dict(headers)
+            if offset:
+                request_headers["range"] = f"bytes={offset}-"
+
+            limiters = await self._acquire(url)
+            try:
+                async with self._session.stream('GET', url, follow_redirects=True, headers=request_headers, timeout=self.timeout) as response:
+                    if response.status_code == 416 and offset:
+                        # Partial file is already complete
+                        self._release(limiters, response.status_code)
+                        return None
+
+                    response.raise_for_status()
+
+                    if response.status_code != 206:
+                        # Server ignored the range, start over
+                        offset = 0
+
+                    length = response.headers.get("content-length")
+                    length = int(length) if length and length.isdigit() else None
+
+                    if length is None:
+                        warnings.warn("Unable to get 'content-length', it will be set to zero")
+
+                    if (
+                        not offset
+                        and response.headers.get("accept-ranges", "").lower() == "bytes"
+                        and len(self._get_segments(length)) > 1
+                    ):
+                        # Headers are enough, the body is downloaded in segments
+                        self._release(limiters, response.status_code)
+                        return length
+
+                    total_size = offset + length if length is not None else 0
+
+                    with open(part_path, "ab" if offset else "wb") as f:
+                        async for chunk in response.aiter_bytes(chunk_size=self.chunk_size):
+                            await asyncio.to_thread(f.write, chunk)
+                            offset += len(chunk)
+                            await self._report(progress_callback, filename, total_size, offset)
+            except (httpx.TransportError, httpx.StreamError) as error:
+                self._release(limiters, error=True)
+                attempts += 1
+
+                if attempts > self.retries or not self.resume:
+                    raise error
+
+                offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+                continue
+            except Exception:
+                self._release(limiters, error=True)
+                raise
+            except BaseException:
+                self._release(limiters)
+                raise
+
+            self._release(limiters, response.status_code)
+            return None
+
+    def _load_state(self, state_path):
+        if not self.resume or not os.path.exists(state_path):
+            return None
+
+        try:
+            with open(state_path, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(state, dict) or not state.get("total_size"):
+            return None
+
+        return state
+
+    @staticmethod
+    def _save_state(state_path, total_size, segments, written):
+        with open(state_path, "w") as f:
+            json.dump(dict(total_size=total_size, segments=segments, written=written), f)
+
+    async def _download_segments(self, url, filename, part_path, headers, total_size, progress_callback):
+        state_path = part_path + STATE_SUFFIX
+        state = self._load_state(state_path)
+        segments = self._get_segments(total_size)
+        written = {}
+
+        if state and state["total_size"] == total_size and os.path.exists(part_path):
+            segments = state.get("segments") or segments
+            written = {int(index): size for index, size in state.get("written", {}).items()}
+
+        if not written or os.path.getsize(part_path) != total_size:
+            written = {}
+
+            def preallocate():
+                with open(part_path, "wb") as f:
+                    f.truncate(total_size)
+
+            await asyncio.to_thread(preallocate)
+
+            if self.resume:
+                # Marks the preallocated file, so it's never taken for a complete single stream one
+                self._save_state(state_path, total_size, segments, written)
+
+        progress = [sum(written.values())]
+
+        async def download_segment(index, start, end):
+            attempts = 0
+
+            while written.get(index, 0) < end - start + 1:
+                position = start + written.get(index, 0)
+                request_headers = dict(headers, range=f"bytes={position}-{end}")
+                limiters = await self._acquire(url)
+
+                try:
+                    async with self._session.stream('GET', url, follow_redirects=True, headers=request_headers, timeout=self.timeout) as response:
+                        response.raise_for_status()
+
+                        if response.status_code != 206:
+                            raise httpx.StreamError("Server ignored the range of the segment")
+
+                        with open(part_path, "r+b") as f:
+                            await asyncio.to_thread(f.seek, position)
+                            async for chunk in response.aiter_bytes(chunk_size=self.chunk_size):
+                                chunk = chunk[:end - position + 1]
+                                await asyncio.to_thread(f.write, chunk)
+                                position += len(chunk)
+                                written[index] = position - start
+                                progress[0] += len(chunk)
+                                await self._report(progress_callback, filename, total_size, progress[0])
+                except (httpx.TransportError, httpx.StreamError) as error:
+                    self._release(limiters, error=True)
+                    attempts += 1
+
+                    if attempts > self.retries:
+                        raise error
+
+                    continue
+                except Exception:
+                    self._release(limiters, error=True)
+                    raise
+                except BaseException:
+                    self._release(limiters)
+                    raise
+
+                self._release(limiters, response.status_code)
+
+        tasks = [
+            asyncio.ensure_future(download_segment(index, start, end))
+            for index, (start, end) in enumerate(segments)
+        ]
+
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+            if self.resume:
+                self._save_state(state_path, total_size, segments, written)
+            raise
+
+        if os.path.exists(state_path):
+            os.remove(state_path)
+
+
+class BandwidthLimiter:
+    """
+    Caps the bytes per second of every download sharing it
+    """
+
+    def __init__(self, max_bytes_per_second, burst=None):
+        """
+        :param max_bytes_per_second: (`int`) Maximum bandwidth
+        :param burst: (`int`) Bytes allowed to go through without waiting, defaults to a second worth of bandwidth
+        """
+
+        self.rate = float(max_bytes_per_second)
+        self.burst = float(burst if burst is not None else max_bytes_per_second)
+        self._next = None
+
+    async def consume(self, size):
+        now = time.monotonic()
+
+        # Virtual clock of when the bytes so far are allowed, minus the burst credit
+        if self._next is None or self._next < now - self.burst / self.rate:
+            self._next = now - self.burst / self.rate
+
+        self._next += size / self.rate
+        delay = self._next - now
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class MediaDownloader:
+    """
+    Downloads the media of many tweets with bounded concurrency.
+    Every media is downloaded once per `media_key` (or url) and stored by the sha256 of its content,
+    the index maps each tweet id to its files and is kept next to them to dedupe across runs
+    """
+
+    INDEX_FILENAME = "index.json"
+
+    def __init__(
+            self,
+            client,
+            directory="media",
+            concurrency=4,
+            max_bandwidth=None,
+            progress_callback=None,
+            include_retweeted=True,
+            include_quoted=True
+    ):
+        """
+        :param client: (`Twitter`, `TwitterAsync`) Client used for the downloads
+        :param directory: (`str`) Directory of the files and of the index
+        :param concurrency: (`int`) Maximum files downloaded at once
+        :param max_bandwidth: (`int`) Maximum bytes per second of the whole run, `None` for no cap
+        :param progress_callback: (`Callable[[dict], None]`) Called with the aggregated `progress` of the run
+        :param include_retweeted: (`bool`) Download the media of the retweeted tweets too
+        :param include_quoted: (`bool`) Download the media of the quoted tweets too
+        """
+
+        self._client = client
+        self.directory = directory
+        self.concurrency = concurrency
+        self.progress_callback = progress_callback
+        self.include_retweeted = include_retweeted
+        self.include_quoted = include_quoted
+        self._bandwidth = BandwidthLimiter(max_bandwidth) if max_bandwidth else None
+        self._loop = None
+        self._semaphore = None
+        self._downloads = {}
+        self._file_sizes = {}
+        self.errors = {}
+        self.progress = dict(
+            files_total=0,
+            files_done=0,
+            files_skipped=0,
+            files_failed=0,
+            bytes_total=0,
+            bytes_downloaded=0
+        )
+        self.index = self._load_index()
+
+    @property
+    def index_path(self):
+        return os.path.join(self.directory, self.INDEX_FILENAME)
+
+    def _load_index(self):
+        index = dict(tweets={}, media={})
+
+        try:
+            with open(self.index_path, "r") as f:
+                index.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+
+        return index
+
+    def save_index(self):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = self.index_path + ".tmp"
+
+        with open(temp_path, "w") as f:
+            json.dump(self.index, f)
+
+        os.replace(temp_path, self.index_path)
+
+    def get_files(self, tweet_id):
+        """
+        Paths of the files of the tweet
+
+        :param tweet_id: (`str`, `int`) Id of the tweet
+        :return: list[str]
+        """
+
+        return [os.path.join(self.directory, path) for path in self.index["tweets"].get(str(tweet_id), [])]
+
+    @staticmethod
+    def _is_media_source(item):
+        # Media, streams, variants, tweets and threads
+        return any(hasattr(item, name) for name in ("best_stream", "content_type", "media", "tweets"))
+
+    @staticmethod
+    def _get_page_results(item):
+        # Generators yield (object, results) of every page
+        if isinstance(item, tuple) and len(item) == 2 and isinstance(item[1], (list, tuple)):
+            return item[1]
+
+        return item
+
+    def _iter_media(self, item, tweet_id=None):
+        if isinstance(item, (list, tuple, set)):
+            for i in item:
+                yield from self._iter_media(i, tweet_id)
+            return
+
+        if hasattr(item, "best_stream") or hasattr(item, "content_type"):
+            # Media, streams and variants
+            yield tweet_id, item
+            return
+
+        tweets = getattr(item, "tweets", None)
+        if tweets is not None and not hasattr(item, "media"):
+            # Threads
+            yield from self._iter_media(list(tweets), tweet_id)
+            return
+
+        if hasattr(item, "media"):
+            item_id = getattr(item, "id", tweet_id)
+            yield from self._iter_media(list(item.media or []), item_id)
+
+            if self.include_retweeted and getattr(item, "retweeted_tweet", None):
+                yield from self._iter_media(item.retweeted_tweet)
+
+            if self.include_quoted and getattr(item, "quoted_tweet", None):
+                yield from self._iter_media(item.quoted_tweet)
+
+    @staticmethod
+    def _get_key(media, url):
+        return getattr(media, "media_key", None) or getattr(media, "key", None) or url.split("?")[0]
+
+    @staticmethod
+    async def _get_url(media):
+        stream = await media.best_stream() if hasattr(media, "best_stream") else media
+
+        if stream is None:
+            return None
+
+        return getattr(stream, "direct_url", None) or getattr(stream, "url", None)
+
+    async def _on_chunk(self, filename, total_size, downloaded):
+        previous_total, previous_downloaded = self._file_sizes.get(filename, (0, 0))
+        self._file_sizes[filename] = (total_size, downloaded)
+        self.progress["bytes_total"] += (total_size or 0) - previous_total
+        self.progress["bytes_downloaded"] += downloaded - previous_downloaded
+
+        if self._bandwidth is not None:
+            await self._bandwidth.consume(downloaded - previous_downloaded)
+
+        if self.progress_callback:
+            await self._call_progress_callback()
+
+    async def _call_progress_callback(self):
+        if inspect.iscoroutinefunction(self.progress_callback):
+            await self.progress_callback(self.progress)
+        else:
+            self.progress_callback(self.progress)
+
+    def _get_content_path(self, digest, url):
+        extension = os.path.splitext(os.path.basename(url.split("?")[0]))[1]
+        return os.path.join(digest[:2], digest + extension)
+
+    @staticmethod
+    def _hash_file(path):
+        digest = hashlib.sha256()
+
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+
+        return digest.hexdigest()
+
+    async def _download(self, key, url):
+        known_path = self.index["media"].get(key)
+        if known_path and os.path.exists(os.path.join(self.directory, known_path)):
+            self.progress["files_skipped"] += 1
+            return known_path
+
+        temp_directory = os.path.join(self.directory, ".tmp")
+        os.makedirs(temp_directory, exist_ok=True)
+
+        # Named after the url, so an interrupted run resumes the same partial file
+        temp_path = os.path.join(temp_directory, hashlib.sha1(url.encode()).hexdigest())
+
+        async with self._semaphore:
+            await self._client.http.download_media(url, temp_path, self._on_chunk)
+
+        digest = await asyncio.to_thread(self._hash_file, temp_path)
+        content_path = self._get_content_path(digest, url)
+        full_path = os.path.join(self.directory, content_path)
+
+        if os.path.exists(full_path):
+            # Same content under another media key
+            os.remove(temp_path)
+        else:
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            os.replace(temp_path, full_path)
+
+        self.index["media"][key] = content_path
+        self.progress["files_done"] += 1
+        return content_path
+
+    async def _add(self, tweet_id, media):
+        try:
+            url = await self._get_url(media)
+        except ValueError:
+            # Media without any stream
+            url = None
+
+        if not url:
+            return None
+
+        key = self._get_key(media, url)
+        task = self._downloads.get(key)
+
+        if task is None:
+            self.progress["files_total"] += 1
+            task = self._downloads[key] = asyncio.ensure_future(self._download(key, url))
+        else:
+            self.progress["files_skipped"] += 1
+
+        try:
+            path = await asyncio.shield(task)
+        except Exception as error:
+            if key not in self.errors:
+                self.errors[key] = error
+                self.progress["files_failed"] += 1
+            return None
+        finally:
+            if self.progress_callback:
+                await self._call_progress_callback()
+
+        if tweet_id is not None:
+            files = self.index["tweets"].setdefault(str(tweet_id), [])
+            if path not in files:
+                files.append(path)
+
+        return path
+
+    async def download(self, source):
+        """
+        Download the media of the source, failed downloads are kept in `errors`
+
+        :param source: Tweet, Media, Stream, thread or a list of them, the result of a client method,
+                        an `iter_*` generator of the client or any other (async) iterable of them
+        :return: dict (tweet id -> paths of the files, of this run)
+        """
+
+        is_async = hasattr(source, "__aiter__")
+        is_iterable = hasattr(source, "__iter__") and not isinstance(source, (str, bytes, dict))
+        if not is_async and not is_iterable and not self._is_media_source(source):
+            raise TypeError(f"Can't download the media of '{type(source).__name__}'")
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Sync clients run every call in its own loop
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._downloads = {}
+
+        tasks, tweet_ids = [], []
+
+        def add(item):
+            for tweet_id, media in self._iter_media(item):
+                if tweet_id is not None and tweet_id not in tweet_ids:
+                    tweet_ids.append(tweet_id)
+
+                tasks.append(asyncio.ensure_future(self._add(tweet_id, media)))
+
+        try:
+            if is_async:
+                async for item in source:
+                    add(self._get_page_results(item))
+            elif self._is_media_source(source) or isinstance(source, (list, tuple, set)):
+                add(source)
+            else:
+                # Sync generators and other iterables
+                for item in source:
+                    add(self._get_page_results(item))
+
+            await asyncio.gather(*tasks)
+        finally:
+            self.save_index()
+
+        return {str(tweet_id): self.get_files(tweet_id) for tweet_id in tweet_ids}
@@ -0,0 +1,204 @@
+import asyncio
+import time
+from .exceptions import GuestTokenNotFound
+
+
+class GuestToken:
+    """
+    Guest token with its own rate limits per endpoint
+    """
+
+    def __init__(self, token):
+        self.token = token
+        self.created = time.time()
+        self.uses = 0
+        self.limits = {}
+
+    def remaining(self, endpoint):
+        remaining, reset = self.limits.get(endpoint, (None, None))
+
+        if remaining is None or reset <= time.time():
+            return float("inf")
+
+        return remaining
+
+    def reset(self, endpoint):
+        return self.limits.get(endpoint, (None, None))[1]
+
+    def update(self, endpoint, headers, status_code=None):
+        if all(key in headers for key in ['x-rate-limit-reset', 'x-rate-limit-remaining']):
+            self.limits[endpoint] = (int(headers['x-rate-limit-remaining']), int(headers['x-rate-limit-reset']))
+        elif status_code == 429:
+            self.limits[endpoint] = (0, int(time.time()) + 60)
+
+    def to_dict(self):
+        return dict(
+            token=self.token,
+            created=self.created,
+            uses=self.uses,
+            limits={endpoint: dict(remaining=limit[0], reset=limit[1]) for endpoint, limit in self.limits.items()}
+        )
+
+    def __str__(self):
+        return self.token
+
+    def __repr__(self):
+        return "GuestToken(token={}, uses={})".format(self.token, self.uses)
+
+
+class GuestTokenPool:
+    """
+    Pool of guest tokens which are prefetched in background and rotated by their remaining quota,
+    bad or expired tokens are retired and replaced transparently
+    """
+
+    BAD_TOKEN_CODES = (239,)
+
+    def __init__(self, fetcher, size=3, ttl=10800):
+        """
+        :param fetcher: (`coroutine function`) Fetches a new guest token
+        :param size: (`int`) Number of tokens to keep in the pool
+        :param ttl: (`int`) Seconds after which a token is considered expired
+        """
+
+        self.size = max(int(size), 1)
+        self.ttl = ttl
+        self._fetcher = fetcher
+        self._tokens = []
+        self._prefetch_task = None
+
+    @property
+    def tokens(self):
+        return self._tokens
+
+    def _remove_expired(self):
+        now = time.time()
+        self._tokens = [token for token in self._tokens if token.created + self.ttl > now]
+
+    def _add_token(self, token, created=None):
+        if token and token not in [i.token for i in self._tokens] and len(self._tokens) < self.size:
+            guest_token = GuestToken(token)
+            guest_token.created = created or guest_token.created
+            self._tokens.append(guest_token)
+
+    def add(self, token, created=None):
+        """
+        Add an already obtained token (i.e. restored from the session) to the pool
+
+        :param token: (`str`) Guest token
+        :param created: (`float`) Epoch time when the token was obtained
+        """
+
+        self._add_token(token, created)
+        self._remove_expired()
+
+    async def _fill(self, count):
+        results = await asyncio.gather(*[self._fetcher() for _ in range(count)], return_exceptions=True)
+
+        for result in results:
+            if not isinstance(result, BaseException):
+                self._add_token(result)
+
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if not self._tokens and errors:
+            raise errors[0]
+
+    def _is_prefetching(self):
+        task = self._prefetch_task
+
+        if task is None or task.done():
+            return False
+
+        # Sync clients run every call in a new event loop, a task of the older loop never finishes
+        return task.get_loop() is asyncio.get_running_loop()
+
+    def prefetch(self):
+        """
+        Refill the pool in background without waiting for it
+        """
+
+        self._remove_expired()
+        missing = self.size - len(self._tokens)
+
+        if missing > 0 and not self._is_prefetching():
+            self._prefetch_task = asyncio.ensure_future(self._fill(missing))
+            self._prefetch_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    async def get(self, endpoint=None, prefetch=True):
+        """
+        Get the token with most remaining quota for the endpoint, least used one on ties
+
+        :param endpoint: (`str`) Endpoint tag
+        :param prefetch: (`bool`) Refill the pool in background
+        :return: GuestToken
+        """
+
+        self._remove_expired()
+
+        if not self._tokens:
+            await self._fill(1)
+
+        if not self._tokens:
+            raise GuestTokenNotFound(response=None, message="Guest Token couldn't be found")
+
+        available = [token for token in self._tokens if token.remaining(endpoint) > 0]
+        if not available and len(self._tokens) < self.size:
+            # Every token is exhausted for the endpoint, a fresh one starts with the full quota
+            await self._fill(1)
+            available = [token for token in self._tokens if token.remaining(endpoint) > 0]
+
+        if available:
+            token = max(available, key=lambda i: (i.remaining(endpoint), -i.uses))
+        else:
+            token = min(self._tokens, key=lambda i: i.reset(endpoint) or 0)
+
+        token.uses += 1
+
+        if prefetch:
+            self.prefetch()
+
+        return token
+
+    def expires(self, token):
+        for guest_token in self._tokens:
+            if guest_token.token == token:
+                return guest_token.created + self.ttl
+
+        return None
+
+    def has_quota(self, endpoint, exclude=None):
+        return any(token.remaining(endpoint) > 0 for token in self._tokens if token is not exclude)
+
+    def update(self, token, endpoint, response):
+        token.update(endpoint, response.headers, response.status_code)
+
+    def is_bad_token(self, response):
+        if response.status_code not in (200, 401, 403):
+            return False
+
+        response_json = response.json()
+        if not isinstance(response_json, dict) or response_json.get("data"):
+            return False
+
+        return any(
+            isinstance(error, dict) and error.get("code") in self.BAD_TOKEN_CODES
+            for error in response_json.get("errors") or []
+        )
+
+    def retire(self, token):
+        if token in self._tokens:
+            self._tokens.remove(token)
+
+        self.prefetch()
+
+    def clear(self):
+        self._tokens = []
+
+    def to_dict(self):
+        return dict(size=self.size, tokens=[token.to_dict() for token in self._tokens])
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def __repr__(self):
+        return "GuestTokenPool(size={}, tokens={})".format(self.size, len(self._tokens))
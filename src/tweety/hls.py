@@ -0,0 +1,378 @@
+import asyncio
+import inspect
+import os
+import re
+import time
+from collections import deque
+from urllib.parse import urljoin
+import httpx
+
+ATTRIBUTE_LIST_REGEX = re.compile(r'''([A-Z0-9-]+)=("[^"]*"|[^,]*)''')
+
+
+def parse_attribute_list(text):
+    attributes = {}
+
+    for name, value in ATTRIBUTE_LIST_REGEX.findall(text):
+        attributes[name] = value[1:-1] if value.startswith('"') else value
+
+    return attributes
+
+
+class HLSVariant:
+    def __init__(self, url, attributes):
+        self.url = url
+        self.attributes = attributes
+        self.bandwidth = int(attributes.get("BANDWIDTH", 0) or 0)
+        self.resolution = attributes.get("RESOLUTION")
+        self.codecs = attributes.get("CODECS")
+        self.audio = attributes.get("AUDIO")
+
+    @property
+    def pixels(self):
+        if not self.resolution or "x" not in self.resolution:
+            return 0
+
+        width, height = self.resolution.split("x", 1)
+        return int(width) * int(height) if width.isdigit() and height.isdigit() else 0
+
+    def __repr__(self):
+        return "HLSVariant(bandwidth={}, resolution={})".format(self.bandwidth, self.resolution)
+
+
+class HLSSegment:
+    __slots__ = ("url", "duration", "sequence", "byte_range")
+
+    def __init__(self, url, duration, sequence, byte_range=None):
+        self.url = url
+        self.duration = duration
+        self.sequence = sequence
+        self.byte_range = byte_range
+
+    def __repr__(self):
+        return "HLSSegment(sequence={}, duration={})".format(self.sequence, self.duration)
+
+
+class HLSPlaylist:
+    """
+    Master or media playlist of an HLS stream
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.variants = []
+        self.media = []
+        self.segments = []
+        self.init_section = None
+        self.target_duration = None
+        self.media_sequence = 0
+        self.ended = False
+
+    @property
+    def is_master(self):
+        return bool(self.variants)
+
+    @classmethod
+    def parse(cls, content, url):
+        """
+        Parse the playlist
+
+        :param content: (`str`) Content of the playlist
+        :param url: (`str`) Url of the playlist, relative uris are resolved against it
+        :return: HLSPlaylist
+        """
+
+        playlist = cls(url)
+        lines = [line.strip() for line in content.splitlines() if line.strip()]
+
+        if not lines or not lines[0].startswith("#EXTM3U"):
+            raise ValueError("Not an HLS playlist")
+
+        stream_info, duration, byte_range = None, None, None
+        sequence = None
+        # End of the last sub-range of every resource, a range without offset continues from it
+        range_ends = {}
+
+        for line in lines[1:]:
+            if line.startswith("#EXT-X-STREAM-INF:"):
+                stream_info = parse_attribute_list(line.split(":", 1)[1])
+            elif line.startswith("#EXT-X-MEDIA:"):
+                media = parse_attribute_list(line.split(":", 1)[1])
+                if media.get("URI"):
+                    media["URI"] = urljoin(url, media["URI"])
+                playlist.media.append(media)
+            elif line.startswith("#EXT-X-TARGETDURATION:"):
+                playlist.target_duration = float(line.split(":", 1)[1])
+            elif line.startswith("#EXT-X-MEDIA-SEQUENCE:"):
+                playlist.media_sequence = int(line.split(":", 1)[1])
+            elif line.startswith("#EXT-X-MAP:"):
+                playlist.init_section = urljoin(url, parse_attribute_list(line.split(":", 1)[1]).get("URI", ""))
+            elif line.startswith("#EXT-X-KEY:"):
+                method = parse_attribute_list(line.split(":", 1)[1]).get("METHOD", "NONE")
+                if method != "NONE":
+                    raise ValueError(f"Encrypted HLS streams ({method}) aren't supported")
+            elif line.startswith("#EXTINF:"):
+                duration = float(line.split(":", 1)[1].split(",", 1)[0] or 0)
+            elif line.startswith("#EXT-X-BYTERANGE:"):
+                byte_range = line.split(":", 1)[1]
+            elif line.startswith("#EXT-X-ENDLIST"):
+                playlist.ended = True
+            elif not line.startswith("#"):
+                if stream_info is not None:
+                    playlist.variants.append(HLSVariant(urljoin(url, line), stream_info))
+                    stream_info = None
+                else:
+                    sequence = playlist.media_sequence if sequence is None else sequence + 1
+                    segment_url = urljoin(url, line)
+
+                    if byte_range:
+                        length, _, offset = byte_range.partition("@")
+                        offset = int(offset) if offset else range_ends.get(segment_url, 0)
+                        range_ends[segment_url] = offset + int(length)
+                        byte_range = f"{length}@{offset}"
+
+                    playlist.segments.append(HLSSegment(segment_url, duration, sequence, byte_range))
+                    duration, byte_range = None, None
+
+        return playlist
+
+    def get_variant(self, rendition="best"):
+        """
+        Pick a variant of the master playlist
+
+        :param rendition: (`str`, `int`, `Callable[[list[HLSVariant]], HLSVariant]`) `best`, `worst`,
+                            maximum bandwidth or a function picking the variant
+        :return: HLSVariant
+        """
+
+        if not self.variants:
+            return None
+
+        if callable(rendition):
+            return rendition(self.variants)
+
+        variants = sorted(self.variants, key=lambda variant: (variant.pixels, variant.bandwidth))
+
+        if rendition == "worst":
+            return variants[0]
+
+        if isinstance(rendition, int):
+            fitting = [variant for variant in variants if variant.bandwidth <= rendition]
+            return fitting[-1] if fitting else variants[0]
+
+        return variants[-1]
+
+    def get_audio(self, variant):
+        """
+        Get the url of the separate audio playlist of the variant if there is one
+        """
+
+        if not variant or not variant.audio:
+            return None
+
+        group = [media for media in self.media if media.get("TYPE") == "AUDIO" and media.get("GROUP-ID") == variant.audio]
+        default = [media for media in group if media.get("DEFAULT") == "YES"]
+        media = (default or group or [None])[0]
+        return media.get("URI") if media else None
+
+    def __repr__(self):
+        return "HLSPlaylist(variants={}, segments={}, ended={})".format(
+            len(self.variants), len(self.segments), self.ended
+        )
+
+
+class HLSDownloader:
+    """
+    Downloads an HLS stream to a single file without ffmpeg.
+    Segments are fetched concurrently within a bounded window and written in order,
+    so the output is the plain concatenation of the segments (`.ts`, or fragmented mp4 after its init section).
+    Live playlists are tailed until they end, `stop` is called or `max_duration` is reached
+    """
+
+    def __init__(self, session, concurrency=None, window=8, retries=3, timeout=60, poll_interval=None):
+        """
+        :param session: (`httpx.AsyncClient`) Client used for the requests
+        :param concurrency: (`ConcurrencyController`) Limits the connections to the media hosts
+        :param window: (`int`) Maximum segments fetched at once, also bounds the memory used
+        :param retries: (`int`) Retries of a failed segment
+        :param timeout: (`int`) Timeout of a request in seconds
+        :param poll_interval: (`float`) Seconds between reloads of a live playlist, defaults to half the target duration
+        """
+
+        self._session = session
+        self._concurrency = concurrency
+        self.window = max(int(window), 1)
+        self.retries = retries
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._stopped = False
+
+    def stop(self):
+        """
+        Stop tailing the live playlists, the segments already listed are still written
+        """
+
+        self._stopped = True
+
+    async def _get(self, url, headers=None):
+        limiters = await self._concurrency.acquire(url, account=False) if self._concurrency is not None else []
+        started = time.perf_counter()
+
+        try:
+            response = await self._session.get(url, headers=headers, follow_redirects=True, timeout=self.timeout)
+            response.raise_for_status()
+        except Exception:
+            if self._concurrency is not None:
+                self._concurrency.release(limiters, error=True)
+            raise
+        except BaseException:
+            if self._concurrency is not None:
+                self._concurrency.release(limiters)
+            raise
+
+        if self._concurrency is not None:
+            self._concurrency.release(limiters, time.perf_counter() - started, response.status_code)
+
+        return response
+
+    async def get_playlist(self, url):
+        response = await self._get(url)
+        return HLSPlaylist.parse(response.text, str(response.url))
+
+    async def _fetch_segment(self, segment):
+        headers = None
+
+        if segment.byte_range:
+            length, _, offset = segment.byte_range.partition("@")
+            offset = int(offset or 0)
+            headers = {"range": f"bytes={offset}-{offset + int(length) - 1}"}
+
+        for attempt in range(self.retries + 1):
+            try:
+                return (await self._get(segment.url, headers)).content
+            except (httpx.TransportError, httpx.HTTPStatusError):
+                if attempt >= self.retries:
+                    raise
+
+                await asyncio.sleep(min(2 ** attempt, 10))
+
+    @staticmethod
+    async def _report(progress_callback, filename, segments, written):
+        if not progress_callback:
+            return
+
+        if inspect.iscoroutinefunction(progress_callback):
+            await progress_callback(filename, segments, written)
+        else:
+            progress_callback(filename, segments, written)
+
+    async def download(
+            self,
+            url,
+            filename=None,
+            rendition="best",
+            audio=True,
+            audio_filename=None,
+            live=None,
+            max_duration=None,
+            progress_callback=None
+    ):
+        """
+        Download the stream to the file.
+        Variants of X videos carry no audio, it's a separate rendition downloaded to its own file next to the video
+
+        :param url: (`str`) Url of the master or media playlist
+        :param filename: (`str`) Path of the output file, defaults to the name of the playlist with `.ts` or `.mp4` (fragmented streams)
+        :param rendition: (`str`, `int`, `Callable`) Variant of a master playlist, see `HLSPlaylist.get_variant`
+        :param audio: (`bool`) Download the separate audio rendition of the variant if there is one
+        :param audio_filename: (`str`) Path of the separate audio, defaults to the name of the video with `.audio` before its extension
+        :param live: (`bool`) Tail the playlist until it ends, defaults to True if the playlist isn't ended
+        :param max_duration: (`float`) Stop tailing a live playlist after these many seconds
+        :param progress_callback: (`Callable[[str, int, int], None]`) Called with filename, segments listed and segments written
+        :return: str (filename), or tuple[str, str] (video and audio filenames) if the audio is separate
+        """
+
+        self._stopped = False
+        playlist = await self.get_playlist(url)
+
+        if playlist.is_master:
+            variant = playlist.get_variant(rendition)
+            audio_url = playlist.get_audio(variant)
+
+            jobs = [self._download_media_playlist(variant.url, filename, live, max_duration, progress_callback)]
+            if audio and audio_url:
+                audio_name = os.path.splitext(filename or self._get_name(variant.url))[0] + ".audio"
+                jobs.append(self._download_media_playlist(
+                    audio_url, audio_filename, live, max_duration, progress_callback, name=audio_name
+                ))
+
+            filenames = await asyncio.gather(*jobs)
+            return filenames[0] if len(filenames) == 1 else tuple(filenames)
+        else:
+            filename = await self._download_media_playlist(url, filename, live, max_duration, progress_callback, playlist)
+
+        return filename
+
+    @staticmethod
+    def _get_name(url):
+        return os.path.splitext(os.path.basename(url.split("?")[0]))[0] or "stream"
+
+    async def _download_media_playlist(self, url, filename, live, max_duration, progress_callback, playlist=None, name=None):
+        playlist = playlist or await self.get_playlist(url)
+        live = not playlist.ended if live is None else live
+        started = time.monotonic()
+        next_sequence = None
+        pending = deque()
+        listed, written = 0, 0
+
+        if not filename:
+            filename = (name or self._get_name(url)) + (".mp4" if playlist.init_section else ".ts")
+
+        part_path = filename + ".part"
+
+        with open(part_path, "wb") as f:
+            if playlist.init_section:
+                await asyncio.to_thread(f.write, (await self._get(playlist.init_section)).content)
+
+            async def write_next():
+                nonlocal written
+                data = await pending.popleft()
+                await asyncio.to_thread(f.write, data)
+                written += 1
+                await self._report(progress_callback, filename, listed, written)
+
+            try:
+                while True:
+                    for segment in playlist.segments:
+                        if next_sequence is not None and segment.sequence < next_sequence:
+                            continue
+
+                        next_sequence = segment.sequence + 1
+                        listed += 1
+                        pending.append(asyncio.ensure_future(self._fetch_segment(segment)))
+
+                        if len(pending) >= self.window:
+                            await write_next()
+
+                    timed_out = max_duration is not None and time.monotonic() - started >= max_duration
+                    if not live or playlist.ended or self._stopped or timed_out:
+                        break
+
+                    # Write what's ready while waiting for the playlist to grow
+                    while pending and pending[0].done():
+                        await write_next()
+
+                    await asyncio.sleep(self.poll_interval or max((playlist.target_duration or 2) / 2, 0.5))
+                    playlist = await self.get_playlist(url)
+
+                while pending:
+                    await write_next()
+            except BaseException:
+                for task in pending:
+                    task.cancel()
+
+                await asyncio.gather(*pending, return_exceptions=True)
+                raise
+
+        os.replace(part_path, filename)
+        return filename
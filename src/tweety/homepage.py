@@ -0,0 +1,122 @@
+import html
+import re
+from .utils import MIGRATION_REGEX
+
+TAG_REGEX = r"""<{}\b[^>]*>"""
+ATTRIBUTE_REGEX = re.compile(r"""([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""")
+META_REGEX = re.compile(TAG_REGEX.format("meta"), flags=re.IGNORECASE)
+INPUT_REGEX = re.compile(TAG_REGEX.format("input"), flags=re.IGNORECASE)
+PATH_REGEX = re.compile(TAG_REGEX.format("path"), flags=re.IGNORECASE)
+FORM_REGEX = re.compile(r"""(<form\b[^>]*>)(.*?)</form>""", flags=(re.IGNORECASE | re.DOTALL))
+ANIMATION_FRAME_REGEX = re.compile(
+    r"""<(\w+)\b[^>]*\bid\s*=\s*["']loading-x-anim[^"']*["'][^>]*>(.*?)</\1>""", flags=(re.IGNORECASE | re.DOTALL))
+ON_DEMAND_FILE_REGEX = re.compile(
+    r"""['|\"]{1}ondemand\.s['|\"]{1}:\s*['|\"]{1}([\w]*)['|\"]{1}""", flags=(re.VERBOSE | re.MULTILINE))
+
+
+def parse_attributes(tag):
+    attributes = {}
+
+    for match in ATTRIBUTE_REGEX.finditer(tag):
+        name, *values = match.groups()
+        value = next((value for value in values if value is not None), "")
+        attributes.setdefault(name.lower(), html.unescape(value))
+
+    return attributes
+
+
+class HomePage:
+    """
+    Fields of the x.com home page required by the bootstrap,
+    extracted with regular expressions instead of building the whole document tree
+    """
+
+    def __init__(self, content):
+        """
+        :param content: (`str`, `bytes`) Content of the home page
+        """
+
+        self.content = content.decode("utf-8", "replace") if isinstance(content, bytes) else str(content)
+        self._meta = None
+
+    @classmethod
+    def from_response(cls, response):
+        return cls(response.content)
+
+    def _get_meta_tags(self):
+        if self._meta is None:
+            self._meta = [parse_attributes(tag) for tag in META_REGEX.findall(self.content)]
+
+        return self._meta
+
+    def get_meta(self, **attributes):
+        for meta in self._get_meta_tags():
+            if all(meta.get(name.replace("_", "-")) == value for name, value in attributes.items()):
+                return meta
+
+        return None
+
+    @property
+    def verification_key(self):
+        meta = self.get_meta(name="twitter-site-verification")
+        return meta.get("content") if meta else None
+
+    @property
+    def on_demand_hash(self):
+        on_demand_file = ON_DEMAND_FILE_REGEX.search(self.content)
+        return on_demand_file.group(1) if on_demand_file else None
+
+    @property
+    def animation_frames(self):
+        """
+        Path of every `loading-x-anim` frame, in the order of the document
+
+        :return: list[str]
+        """
+
+        frames = []
+        for match in ANIMATION_FRAME_REGEX.finditer(self.content):
+            paths = [parse_attributes(tag).get("d") for tag in PATH_REGEX.findall(match.group(2))]
+            frames.append(paths[1] if len(paths) > 1 else None)
+
+        return frames
+
+    @property
+    def migration_url(self):
+        refresh = self.get_meta(http_equiv="refresh")
+        migration_url = MIGRATION_REGEX.search(str(refresh.get("content"))) if refresh else None
+        migration_url = migration_url or MIGRATION_REGEX.search(self.content)
+        return migration_url.group(0) if migration_url else None
+
+    @property
+    def migration_form(self):
+        """
+        Get the migration form as a dict of `action`, `method` and `data`
+
+        :return: dict or None
+        """
+
+        for match in FORM_REGEX.finditer(self.content):
+            attributes = parse_attributes(match.group(1))
+
+            if attributes.get("name") != "f" and attributes.get("action") != "https://x.com/x/migrate":
+                continue
+
+            data = {}
+            for tag in INPUT_REGEX.findall(match.group(2)):
+                input_field = parse_attributes(tag)
+                data[input_field.get("name")] = input_field.get("value")
+
+            return dict(
+                action=attributes.get("action", "https://x.com/x/migrate"),
+                method=attributes.get("method", "POST"),
+                data=data
+            )
+
+        return None
+
+    def __str__(self):
+        return self.content
+
+    def __repr__(self):
+        return "HomePage(size={})".format(len(self.content))
@@ -1,40 +1,93 @@
 import asyncio
-import inspect
+import contextvars
 import os
 import random
 import re
+import time
 import traceback
 import uuid
-import warnings
 from typing import Callable
 from urllib.parse import quote, urlparse
-import bs4
 import httpx
 from .exceptions import GuestTokenNotFound, TwitterError, UserNotFound, InvalidCredentials
 from .types import User
 from .types.n_types import GenericError
-from .utils import custom_json, GUEST_TOKEN_REGEX, get_random_string, MIGRATION_REGEX, Warn
+from .utils import custom_json, GUEST_TOKEN_REGEX, get_random_string, Warn, get_endpoint_name
 from .builder import UrlBuilder
-from .transaction import TransactionGenerator
+from .homepage import HomePage
+from .transaction import TransactionGenerator, DEFAULT_TRANSACTION_CACHE, DEFAULT_TRANSACTION_REGISTRY
+from .ratelimit import RateLimitScheduler
+from .proxy import ProxyPool
+from .retry import RetryPolicy
+from .cache import ResponseCache, BaseCacheBackend
+from .guest import GuestTokenPool
+from .concurrency import ConcurrencyController
+from .metrics import Metrics, add_request_time
+from .tracing import Tracing
+from .download import DownloadEngine
+from .hls import HLSDownloader
 from . import constants
 
 httpx.Response.json = custom_json
 
+# Endpoint tags requested by the current task, lets the account pool learn the endpoint of every method
+REQUEST_ENDPOINTS = contextvars.ContextVar("tweety_request_endpoints", default=None)
+
 
 class Request:
+    GUEST_TOKEN_FALLBACK_DELAY = 2
+    BOOTSTRAP_TTL = 3600
+    TRANSACTION_REFRESH_INTERVAL = 300
 
     def __init__(self, client, max_retries=3, proxy=None, captcha_solver=None, **kwargs):
 
         timeout = kwargs.pop("timeout", 60)
+        wait_on_rate_limit = kwargs.pop("wait_on_rate_limit", True)
+        max_rate_limit_wait = kwargs.pop("max_rate_limit_wait", None)
+        retry_policy = kwargs.pop("retry_policy", None)
+        coalesce_requests = kwargs.pop("coalesce_requests", True)
+        cache = kwargs.pop("cache", None)
+        cassette = kwargs.pop("cassette", None)
+        transaction_cache = kwargs.pop("transaction_cache", DEFAULT_TRANSACTION_CACHE)
+        transaction_registry = kwargs.pop("transaction_registry", DEFAULT_TRANSACTION_REGISTRY)
+        guest_token_pool_size = kwargs.pop("guest_token_pool_size", 3)
+        concurrency = kwargs.pop("concurrency", None)
+        metrics = kwargs.pop("metrics", None)
+        download = kwargs.pop("download", None)
 
         self.user = None
         self.username = None
         self._retries = max_retries
+        self._retry_policy = retry_policy or RetryPolicy(max_attempts=max_retries)
         self._cookie = None
         self._client = client
         self._captcha_solver = captcha_solver
         self._limits = {}
+        self._scheduler = RateLimitScheduler(wait_on_rate_limit, max_rate_limit_wait)
+        self._coalesce_requests = coalesce_requests
+        self._pending_requests = {}
+        self._cache = ResponseCache(cache) if isinstance(cache, BaseCacheBackend) else cache
         self._guest_token = None
+        self._transaction_cache = transaction_cache
+        self._transaction_registry = transaction_registry
+        self._proxy = proxy
+        self._guest_tokens = GuestTokenPool(self._get_guest_token, guest_token_pool_size)
+        if not isinstance(concurrency, ConcurrencyController):
+            concurrency = ConcurrencyController(enabled=False) if concurrency is False else ConcurrencyController(concurrency)
+        self._concurrency = concurrency
+        self._metrics = metrics if metrics is not None else Metrics()
+        self._tracing = Tracing()
+
+        if isinstance(proxy, ProxyPool):
+            kwargs["transport"] = proxy.get_transport(self._get_proxy_key(client))
+            proxy = None
+
+        self._cassette = cassette
+        if cassette is not None:
+            kwargs["transport"] = cassette.get_transport(kwargs.get("transport"), http2=True, proxy=proxy)
+            proxy = None
+
+        self._session_options = dict(http2=True, proxy=proxy, timeout=timeout, follow_redirects=True, **kwargs)
         self._session = httpx.AsyncClient(
             headers={
                 'user-agent': constants.REQUEST_USER_AGENT,
@@ -42,20 +95,29 @@ class Request:
                 'x-twitter-client-language': 'en',
                 'origin': 'https://x.com'
             },
-            http2=True,
-            proxy=proxy,
-            timeout=timeout,
-            follow_redirects=True,
-            **kwargs
+            **self._session_options
         )
+        self._bootstrap_session = None
+        if not isinstance(download, DownloadEngine):
+            download = DownloadEngine(self._session, self._concurrency, **(download or {}))
+        self._downloader = download
         self._builder = UrlBuilder()
+        self._header_template = None
         self._transaction = None
+        self._transaction_expires = None
+        self._transaction_refreshed_at = None
+        self._bootstrap_task = None
         self._guest_token = None
 
     @property
     def session(self):
         return self._session
 
+    def _get_proxy_key(self, client):
+        # Accounts stick to a proxy by their session, guest clients by their own instance
+        session_name = getattr(getattr(client, "session", None), "session_name", None)
+        return session_name or str(id(self))
+
     @property
     def headers(self):
         return self._session.headers
@@ -63,11 +125,13 @@ class Request:
     @headers.setter
     def headers(self, value: dict):
         self._session.headers.update({k.lower(): v for k, v in value.items()})
+        self._header_template = None
 
     def remove_header(self, key):
         lower_key = key.lower()
         if self._session.headers.get(lower_key):
             del self._session.headers[lower_key]
+            self._header_template = None
 
     @property
     def cookies(self):
@@ -78,10 +142,10 @@ class Request:
         self._session.cookies = value
         self._cookie = value
 
-    def _get_request_headers(self, custom_headers=None):
-        if not custom_headers:
-            custom_headers = {}
+    def _get_header_state(self):
+        return bool(self._cookie), self._guest_token
 
+    def _build_header_template(self):
         default_headers = {
             'accept': '*/*',
             'accept-language': 'en-PK,en;q=0.9',
@@ -93,11 +157,10 @@ class Request:
             'sec-fetch-dest': 'empty',
             'sec-fetch-mode': 'cors',
             'sec-fetch-site': 'same-site',
-            'x-csrf-token': self._get_csrf(),
             'x-twitter-active-user': 'yes',
             'x-twitter-client-language': 'en',
             'priority': 'u=1, i',
-            'x-client-uuid': str(uuid.uuid4())
+            'x-client-uuid': None
         }
 
         session_headers = self._session.headers
@@ -113,12 +176,26 @@ class Request:
             if self._guest_token and not self._cookie:
                 default_headers['x-guest-token'] = self._guest_token
 
-        default_headers.update(custom_headers)
+        return {k: v for k, v in default_headers.items() if v is not None}
+
+    def _get_request_headers(self, custom_headers=None):
+        # Template only changes with the auth state (cookies, guest token) or the session headers
+        state = self._get_header_state()
+        if self._header_template is None or self._header_template[0] != state:
+            self._header_template = (state, self._build_header_template())
+
+        headers = self._header_template[1].copy()
+        headers['x-client-uuid'] = str(uuid.uuid4())
+
+        # Kept out of the template, without a ct0 cookie every request needs its own random token
+        if 'x-csrf-token' not in headers:
+            headers['x-csrf-token'] = self._get_csrf()
 
-        headers = {}
-        for header_key, header_value in default_headers.items():
-            if header_value is not None:
-                headers[header_key] = header_value
+        if custom_headers:
+            headers.update(custom_headers)
+            for header_key, header_value in custom_headers.items():
+                if header_value is None:
+                    del headers[header_key]
 
         return headers
 
@@ -131,17 +208,81 @@ class Request:
     def set_user(self, user):
         self.user = user
 
-    def _wait_for_rate_limit(self, url):
-        raise NotImplemented
+    @property
+    def cache(self):
+        return self._cache
+
+    @cache.setter
+    def cache(self, value: ResponseCache):
+        self._cache = ResponseCache(value) if isinstance(value, BaseCacheBackend) else value
+
+    @property
+    def retry_policy(self):
+        return self._retry_policy
+
+    @retry_policy.setter
+    def retry_policy(self, value: RetryPolicy):
+        self._retry_policy = value
+
+    @property
+    def scheduler(self):
+        return self._scheduler
+
+    @property
+    def guest_tokens(self):
+        return self._guest_tokens
+
+    @property
+    def concurrency(self):
+        return self._concurrency
+
+    @property
+    def metrics(self):
+        return self._metrics
+
+    @property
+    def tracing(self):
+        return self._tracing
+
+    async def _send_request(self, request_data, account=True):
+        limiters = await self._concurrency.acquire(request_data["url"], account)
+        started = time.perf_counter()
+
+        try:
+            response = await self._session.request(**request_data)
+        except Exception as request_failed:
+            self._concurrency.release(limiters, error=True)
+            return None, request_failed
+        except BaseException:
+            self._concurrency.release(limiters)
+            raise
+
+        self._concurrency.release(limiters, time.perf_counter() - started, response.status_code)
+        return response, None
+
+    def next_slot(self, endpoint):
+        """
+        Get the epoch time at which the next request to the endpoint can be sent
+
+        :param endpoint: (`str`) Endpoint tag of the request (i.e. GraphQL operation name like `UserTweets`)
+        :return: float
+        """
+        return self._scheduler.next_slot(endpoint)
 
-    async def _update_rate_limit(self, response, func):
+    async def wait_for_slot(self, endpoint):
+        return await self._scheduler.wait_for_slot(endpoint)
+
+    async def _wait_for_rate_limit(self, endpoint):
+        return await self._scheduler.acquire(endpoint)
+
+    async def _update_rate_limit(self, response, endpoint):
         url = response.url
         headers = response.headers
 
         if all(key in headers for key in ['x-rate-limit-reset', 'x-rate-limit-remaining']):
-            self._limits[func] = dict(
+            self._limits[endpoint] = dict(
                 path=url.path if not isinstance(url, str) else url,
-                func=func,
+                func=endpoint,
                 limit_reset=int(headers['x-rate-limit-reset']),
                 limit_remaining=int(headers['x-rate-limit-remaining'])
             )
@@ -168,55 +309,330 @@ class Request:
         return cookies_value
 
     async def _init_local_api(self):
-        cookies = await self.remove_cookies()
+        pending = self._bootstrap_task
+
+        # Concurrent requests wait for a single bootstrap,
+        # sync clients run every call in a new event loop and a task of the older loop never finishes
+        if pending is None or pending.done() or pending.get_loop() is not asyncio.get_running_loop():
+            pending = self._bootstrap_task = asyncio.ensure_future(self._bootstrap())
+
+        return await asyncio.shield(pending)
+
+    async def _bootstrap(self):
         if not self._transaction:
-            home_page_html = await self.get_home_html()
-            self._transaction = TransactionGenerator(home_page_html)
+            await self._load_transaction()
+
+        # Authenticated clients never send the guest token
+        if not self._guest_token and not self._cookie:
+            guest_token = await self._guest_tokens.get()
+            self._guest_token = guest_token.token
+
+        return self._transaction
+
+    def _get_bootstrap_session(self):
+        # Home page is fetched logged out with its own cookie jar,
+        # the cookies of the session stay untouched for the requests running meanwhile
+        if self._bootstrap_session is None:
+            self._bootstrap_session = httpx.AsyncClient(headers=self._session.headers, **self._session_options)
+
+        self._bootstrap_session.cookies.clear()
+        return self._bootstrap_session
+
+    def _get_bootstrap_key(self):
+        proxy = self._proxy
+        if isinstance(proxy, ProxyPool):
+            proxy = proxy.get_proxy(self._get_proxy_key(self._client))
+
+        return self._transaction_registry.get_key(proxy)
+
+    async def _create_transaction(self):
+        home_page_html = await self.get_home_html()
+        return await TransactionGenerator.create(
+            home_page_html,
+            http_client=self._session,
+            cache=self._transaction_cache
+        )
+
+    async def _load_transaction(self):
+        if self._transaction_registry is None:
+            self._transaction = await self._create_transaction()
+            self._transaction_expires = time.time() + self.BOOTSTRAP_TTL
+            return
+
+        self._transaction, self._transaction_expires = await self._transaction_registry.get(
+            self._get_bootstrap_key(),
+            self._create_transaction
+        )
+
+    async def _refresh_transaction(self, rejected):
+        """
+        Replace the rejected transaction generator, `None` if it was already refreshed recently
+        """
+
+        if self._transaction is rejected:
+            now = time.time()
+
+            # Some endpoints answer empty 404s on their own, they shouldn't refetch the home page on every request
+            if self._transaction_refreshed_at is not None and now - self._transaction_refreshed_at < self.TRANSACTION_REFRESH_INTERVAL:
+                return None
+
+            self._transaction_refreshed_at = now
+            if self._transaction_registry is not None:
+                self._transaction_registry.invalidate(self._get_bootstrap_key(), rejected)
+
+            self._transaction = None
+
+        # Requests rejected at the same time share the refresh
+        return await self._init_local_api()
+
+    @staticmethod
+    def _is_transaction_rejected(response):
+        # Rejected transaction ids are answered with an empty 404
+        return response is not None and response.status_code == 404 and not response.content.strip()
+
+    def get_bootstrap_state(self):
+        """
+        Get the bootstrap state which can be saved with the session to skip the bootstrap on the next start
+
+        :return: dict
+        """
+
+        state = {}
+
+        if self._transaction:
+            state["transaction"] = self._transaction.get_state()
+            state["transaction_expires"] = self._transaction_expires
 
-        if not self._guest_token:
-            self._guest_token = await self._get_guest_token()
+        guest_token_expires = self._guest_tokens.expires(self._guest_token)
+        if self._guest_token and guest_token_expires:
+            state["guest_token"] = self._guest_token
+            state["guest_token_expires"] = guest_token_expires
 
-        self.cookies = cookies
+        return state
+
+    def load_bootstrap_state(self, state):
+        """
+        Restore the bootstrap state saved with the session, expired parts are ignored
+
+        :param state: (`dict`) State returned by `get_bootstrap_state`
+        """
+
+        now = time.time()
+        state = state or {}
+
+        if not self._transaction and state.get("transaction") and (state.get("transaction_expires") or 0) > now:
+            try:
+                self._transaction = TransactionGenerator(None, state=state["transaction"])
+                self._transaction_expires = state["transaction_expires"]
+            except Exception:
+                self._transaction = None
+
+            if self._transaction and self._transaction_registry is not None:
+                # Restored state is handed out to the other clients too
+                self._transaction, self._transaction_expires = self._transaction_registry.put(
+                    self._get_bootstrap_key(),
+                    self._transaction,
+                    self._transaction_expires
+                )
+
+        if not self._guest_token and state.get("guest_token") and (state.get("guest_token_expires") or 0) > now:
+            self._guest_tokens.add(state["guest_token"], state["guest_token_expires"] - self._guest_tokens.ttl)
+            self._guest_token = state["guest_token"]
+
+    def _get_auth_identity(self):
+        if isinstance(self._cookie, dict):
+            return self._cookie.get("auth_token") or self._cookie.get("ct0")
+        elif self._cookie:
+            return str(self._cookie)
+
+        return self._guest_token
+
+    def _get_coalescing_key(self, return_raw, ignore_none_data, request_data):
+        if not self._coalesce_requests or str(request_data.get("method")).upper() != "GET":
+            return None
+
+        params = request_data.get("params") or {}
+        headers = request_data.get("headers") or {}
+        return (
+            request_data.get("url"),
+            tuple(sorted((str(k), str(v)) for k, v in params.items())),
+            tuple(sorted((str(k), str(v)) for k, v in headers.items())),
+            self._get_auth_identity(),
+            return_raw,
+            ignore_none_data
+        )
+
+    def _get_cache_key(self, return_raw, is_document, request_data):
+        if not self._cache or return_raw or is_document or str(request_data.get("method")).upper() != "GET":
+            return None, None
+
+        endpoint = request_data.get("endpoint") or get_endpoint_name(request_data.get("url"))
+        if not self._cache.is_cacheable(endpoint):
+            return None, None
+
+        return endpoint, self._cache.get_key(endpoint, request_data.get("url"), request_data.get("params"), self._get_auth_identity())
 
     async def __get_response__(self, return_raw=False, ignore_none_data=False, is_document=False, **request_data):
-        if not self._transaction or not self._guest_token:
-            await self._init_local_api()
+        started = time.perf_counter()
+        endpoint = request_data.get("endpoint") or get_endpoint_name(request_data.get("url"))
+
+        requested_endpoints = REQUEST_ENDPOINTS.get()
+        if requested_endpoints is not None:
+            requested_endpoints.append(endpoint)
+
+        try:
+            with self._tracing.span("tweety.request", endpoint=endpoint, method=request_data.get("method")):
+                return await self._get_cached_response(return_raw, ignore_none_data, is_document, **request_data)
+        except Exception as error:
+            self._metrics.record_error(endpoint, error)
+            raise
+        finally:
+            add_request_time(time.perf_counter() - started)
+
+    async def _get_cached_response(self, return_raw=False, ignore_none_data=False, is_document=False, **request_data):
+        cache_endpoint, cache_key = self._get_cache_key(return_raw, is_document, request_data)
+
+        if cache_key is not None:
+            cached = self._cache.get(cache_endpoint, cache_key)
+            if cached is not None:
+                return cached
+
+        response = await self._get_coalesced_response(return_raw, ignore_none_data, is_document, **request_data)
+
+        if cache_key is not None and isinstance(response, dict) and response.get("data"):
+            self._cache.set(cache_endpoint, cache_key, response)
+
+        return response
+
+    async def _get_coalesced_response(self, return_raw=False, ignore_none_data=False, is_document=False, **request_data):
+        key = None if is_document else self._get_coalescing_key(return_raw, ignore_none_data, request_data)
+
+        if key is None:
+            return await self._get_response(return_raw, ignore_none_data, is_document, **request_data)
+
+        # Identical GET is already in-flight, share its result instead of sending another one
+        pending = self._pending_requests.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._get_response(return_raw, ignore_none_data, is_document, **request_data))
+            self._pending_requests[key] = pending
+            pending.add_done_callback(lambda _: self._pending_requests.pop(key, None))
+
+        # Shielded so a cancelled caller doesn't cancel the request for the other callers
+        return await asyncio.shield(pending)
+
+    async def _get_response(self, return_raw=False, ignore_none_data=False, is_document=False, **request_data):
+        transaction = self._transaction
+        if not transaction or (not self._guest_token and not self._cookie):
+            with self._tracing.span("tweety.bootstrap"):
+                transaction = await self._init_local_api()
 
         new_request = request_data
+        endpoint = new_request.pop("endpoint", None) or get_endpoint_name(new_request["url"])
+        idempotent = new_request.pop("idempotent", None)
         new_request["headers"] = self._get_request_headers(request_data.get("headers", {}))
-        new_request["cookies"] = self._cookie
 
-        transaction_id = self._transaction.generate_transaction_id(
-            new_request["method"],
-            urlparse(new_request["url"]).path,
-        )
-        new_request["headers"]["x-client-transaction-id"] = transaction_id
+        with self._tracing.span("tweety.queue_wait", endpoint=endpoint):
+            await self._wait_for_rate_limit(endpoint)
 
         response = None
         last_error = None
+        guest_token = None
+        retry_state = self._retry_policy.new_state(new_request["method"], idempotent)
+        guest_rotations = 0
+        transaction_refreshed = is_document
 
-        for retry in range(self._retries):
+        with self._tracing.span("tweety.send", endpoint=endpoint, method=new_request["method"]) as send_span:
+            # Slot is reserved from here on, anything failing before the response is handled gives it back
             try:
-                response = await self._session.request(**new_request)
-                break
-            except Exception as request_failed:
-                last_error = request_failed
-                pass
-
-        if not response:
-            raise last_error
-
-        await self._update_rate_limit(response, inspect.stack()[1][3])
+                if not self._cookie:
+                    with self._tracing.span("tweety.guest_token", endpoint=endpoint):
+                        guest_token = await self._guest_tokens.get(endpoint)
+                    new_request["headers"]["x-guest-token"] = guest_token.token
+
+                with self._tracing.span("tweety.transaction_id"):
+                    new_request["headers"]["x-client-transaction-id"] = transaction.generate_transaction_id(
+                        new_request["method"],
+                        urlparse(new_request["url"]).path,
+                    )
+
+                started = time.perf_counter()
+                while True:
+                    response, last_error = await self._send_request(new_request)
+
+                    if guest_token is not None and response is not None:
+                        if self._rotate_guest_token(guest_token, endpoint, response) and guest_rotations < self._guest_tokens.size:
+                            guest_rotations += 1
+                            guest_token = await self._guest_tokens.get(endpoint)
+                            new_request["headers"]["x-guest-token"] = guest_token.token
+                            continue
+
+                    if not transaction_refreshed and self._is_transaction_rejected(response):
+                        refreshed = await self._refresh_transaction(transaction)
+
+                        if refreshed is not None:
+                            transaction, transaction_refreshed = refreshed, True
+                            new_request["headers"]["x-client-transaction-id"] = transaction.generate_transaction_id(
+                                new_request["method"],
+                                urlparse(new_request["url"]).path,
+                            )
+                            continue
+
+                    retry_after = retry_state.next_delay(response, last_error)
+                    if retry_after is None:
+                        break
+
+                    await asyncio.sleep(retry_after)
+            except BaseException:
+                self._scheduler.release(endpoint)
+                raise
+
+            if send_span is not None:
+                send_span.set_attribute("attempts", retry_state.attempts)
+                send_span.set_attribute("status_code", response.status_code if response is not None else None)
+
+            if last_error is not None:
+                self._scheduler.release(endpoint)
+                raise last_error
+
+        if guest_token is not None and self._guest_tokens.has_quota(endpoint):
+            # Limits are per guest token, the endpoint isn't exhausted while another token has quota
+            self._scheduler.release(endpoint)
+        else:
+            self._scheduler.release(endpoint, response.headers, response.status_code)
+        await self._update_rate_limit(response, endpoint)
         await self._update_cookies(response)
+        network_time = time.perf_counter() - started
+        retries = sum(retry_state.retries.values()) + guest_rotations + int(transaction_refreshed and not is_document)
 
         if is_document:
+            self._metrics.record_request(endpoint, network_time, None, len(response.content), retries, response.headers)
             return response
 
-        response_json = response.json()  # noqa
-        if ignore_none_data and len(response.text) == 0:
+        parse_started = time.perf_counter()
+        with self._tracing.span("tweety.decode", endpoint=endpoint, size=len(response.content)):
+            response_json = response.json()  # noqa
+        self._metrics.record_request(
+            endpoint,
+            network_time,
+            time.perf_counter() - parse_started,
+            len(response.content),
+            retries,
+            response.headers
+        )
+        if ignore_none_data and len(response.content) == 0:
             return None
 
-        if (not response_json and response.text and response.text.lower() == "rate limit exceeded") or response.status_code == 429:
+        with self._tracing.span("tweety.error_mapping", endpoint=endpoint):
+            response_json = self._map_errors(response, response_json)
+
+        if return_raw:
+            return response
+
+        return response_json
+
+    @staticmethod
+    def _map_errors(response, response_json):
+        if (not response_json and response.content.strip().lower() == b"rate limit exceeded") or response.status_code == 429:
             response_json = {"errors": [{"code": 88, "message": "Rate limit exceeded."}]}
         elif not response_json and response.status_code in [403, 401]:
             response_json = {"errors": [{"code": 32, "message": "Couldn't authenticate you"}]}
@@ -243,9 +659,6 @@ class Request:
 
             return GenericError(response, error_code, error_message)
 
-        if return_raw:
-            return response
-
         return response_json
 
     def solve_captcha(self, websiteUrl="https://twitter.com/", blob_data=None):
@@ -257,58 +670,89 @@ class Request:
 
     async def get_home_html(self):
         home_page = None
-        headers = self._get_request_headers()
+        session = self._get_bootstrap_session()
+        headers = self._get_request_headers({"x-csrf-token": None, "x-twitter-auth-type": None})
         if headers.get("authorization"):
             del headers["authorization"]
         try:
-            response = await self._session.request(method="GET", url="https://x.com/?mx=2", headers=headers)
+            response = await session.request(method="GET", url="https://x.com/?mx=2", headers=headers)
 
             if response.status_code not in range(200, 300):
-                response = await self._session.request(method="GET", url=self._builder.URL_HOME_PAGE, headers=headers)
+                response = await session.request(method="GET", url=self._builder.URL_HOME_PAGE, headers=headers)
 
-            home_page = bs4.BeautifulSoup(response.content, 'lxml')
-            migration_url = home_page.select_one("meta[http-equiv='refresh']")
-            migration_redirection_url = re.search(MIGRATION_REGEX, str(migration_url)) or re.search(MIGRATION_REGEX, str(response.content))
+            home_page = HomePage.from_response(response)
+            migration_url = home_page.migration_url
 
-            if migration_redirection_url:
-                response = await self._session.request(method="GET", url=migration_redirection_url.group(0), headers=headers)
-                home_page = bs4.BeautifulSoup(response.content, 'lxml')
-            migration_form = home_page.select_one("form[name='f']") or home_page.select_one(f"form[action='https://x.com/x/migrate']")
+            if migration_url:
+                response = await session.request(method="GET", url=migration_url, headers=headers)
+                home_page = HomePage.from_response(response)
+            migration_form = home_page.migration_form
 
             if migration_form:
-                url = migration_form.attrs.get("action", 'https://x.com/x/migrate')
-                method = migration_form.attrs.get("method", "POST")
-                request_payload = {input_field.get("name"): input_field.get("value") for input_field in migration_form.select("input")}
-                response = await self._session.request(method=method, url=url, data=request_payload, headers=headers)
-                home_page = bs4.BeautifulSoup(response.content, 'lxml')
+                response = await session.request(
+                    method=migration_form["method"],
+                    url=migration_form["action"],
+                    data=migration_form["data"],
+                    headers=headers
+                )
+                home_page = HomePage.from_response(response)
         except Exception as twitter_home_error:
             raise ValueError(f"Unable to get Twitter Home Page : {str(twitter_home_error)}")
         return home_page
 
-    async def _get_guest_token(self):
-        token = None
+    def _rotate_guest_token(self, guest_token, endpoint, response):
+        self._guest_tokens.update(guest_token, endpoint, response)
+
+        if self._guest_tokens.is_bad_token(response):
+            self._guest_tokens.retire(guest_token)
+            return True
+
+        return response.status_code == 429 and self._guest_tokens.has_quota(endpoint, exclude=guest_token)
+
+    async def _activate_guest_token(self, headers):
         this_response = None
-        headers = self._get_request_headers()
         try:
             request_data = self._builder.get_guest_token()
+            request_data.pop("endpoint", None)
             request_data["headers"] = headers
             this_response = await self._session.request(**request_data)
-            this_response = this_response.json()
-            token = this_response.get('guest_token')  # noqa
+            return this_response.json().get('guest_token'), this_response  # noqa
         except:
-            pass
+            return None, this_response
 
+    async def _scrape_guest_token(self):
+        this_response = None
         try:
-            if not token:
-                request_data = self._builder.get_guest_token_fallback()
-                request_data["headers"] = headers
-                request_data["headers"] = {"authorization": None, "content-type": None, "x-csrf-token": None}
-                this_response = await self._session.request(**request_data, cookies=None)
-                guest_token = re.findall(GUEST_TOKEN_REGEX, this_response.text)
-                if guest_token:
-                    token = guest_token[0]
+            request_data = self._builder.get_guest_token_fallback()
+            request_data.pop("endpoint", None)
+            request_data["headers"] = {"authorization": None, "content-type": None, "x-csrf-token": None}
+            this_response = await self._session.request(**request_data, cookies=None)
+            guest_token = re.findall(GUEST_TOKEN_REGEX, this_response.text)
+            return guest_token[0] if guest_token else None, this_response
         except:
-            pass
+            return None, this_response
+
+    async def _get_guest_token(self):
+        token = None
+        this_response = None
+        activate = asyncio.ensure_future(self._activate_guest_token(self._get_request_headers()))
+        pending = {activate}
+
+        # Home page is scraped in parallel only if the activation is slow or fails
+        done, _ = await asyncio.wait(pending, timeout=self.GUEST_TOKEN_FALLBACK_DELAY)
+        if not done or not activate.result()[0]:
+            pending.add(asyncio.ensure_future(self._scrape_guest_token()))
+
+        try:
+            while pending and not token:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    token, this_response = task.result()
+                    if token:
+                        break
+        finally:
+            for task in pending:
+                task.cancel()
 
         if not token:
             raise GuestTokenNotFound(response=this_response, message=f"Guest Token couldn't be found")
@@ -550,7 +994,7 @@ class Request:
     async def upload_media_append(self, media_id, payload, headers, segment_index):
         request_data = self._builder.upload_media_append(media_id, segment_index)
         request_data['headers'] = headers
-        request_data['data'] = payload
+        request_data['content'] = payload
 
         response = await self.__get_response__(ignore_none_data=True, **request_data)
         return response
@@ -824,27 +1268,8 @@ class Request:
         if media_url.startswith("https://ton.twitter.com") or media_url.startswith("https://ton.x.com"):
             headers['referer'] = "https://x.com/"
 
-        async with self._session.stream('GET', media_url, follow_redirects=True, headers=headers, timeout=600) as response:
-            response.raise_for_status()
+        return await self._downloader.download(media_url, filename, headers, progress_callback)
 
-            try:
-                total_size = int(response.headers['content-length'])
-            except:
-                warnings.warn("Unable to get 'content-length', it will be set to zero")
-                total_size = 0
-
-            downloaded = 0
-            f = open(filename, 'wb')
-            async for chunk in response.aiter_bytes(chunk_size=8192):
-                f.write(chunk)
-                downloaded += len(chunk)
-
-                if progress_callback:
-                    if inspect.iscoroutinefunction(progress_callback):
-                        await progress_callback(filename, total_size, downloaded)
-                    else:
-                        progress_callback(filename, total_size, downloaded)
-
-            f.close()
-
-        return filename
+    async def download_stream(self, playlist_url, filename: str = None, downloader: HLSDownloader = None, **kwargs):
+        downloader = downloader or HLSDownloader(self._session, self._concurrency)
+        return await downloader.download(playlist_url, filename, **kwargs)
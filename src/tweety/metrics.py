@@ -0,0 +1,216 @@
+import contextvars
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Seconds spent waiting for the API in the current task, lets the page parsers time themselves
+REQUEST_TIME = contextvars.ContextVar("tweety_request_time", default=None)
+
+
+def add_request_time(seconds):
+    request_time = REQUEST_TIME.get()
+
+    if request_time is not None:
+        request_time[0] += seconds
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+
+        for index, bucket in enumerate(self.buckets):
+            if value <= bucket:
+                self.counts[index] += 1
+                break
+
+    def cumulative(self):
+        total, result = 0, []
+
+        for bucket, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((bucket, total))
+
+        return result
+
+    def to_dict(self):
+        return dict(
+            count=self.count,
+            sum=round(self.sum, 6),
+            buckets={str(bucket): count for bucket, count in self.cumulative()}
+        )
+
+
+class EndpointMetrics:
+    def __init__(self, endpoint, buckets=DEFAULT_BUCKETS):
+        self.endpoint = endpoint
+        self.requests = 0
+        self.bytes = 0
+        self.retries = 0
+        self.errors = {}
+        self.rate_limit_remaining = None
+        self.network = Histogram(buckets)
+        self.parse = Histogram(buckets)
+
+    def to_dict(self):
+        return dict(
+            requests=self.requests,
+            bytes=self.bytes,
+            retries=self.retries,
+            errors=dict(self.errors),
+            rate_limit_remaining=self.rate_limit_remaining,
+            network=self.network.to_dict(),
+            parse=self.parse.to_dict()
+        )
+
+
+class Metrics:
+    """
+    Instrumentation of a client, per endpoint and per page parser.
+    Available as a snapshot dict or as Prometheus exposition text
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, labels=None):
+        """
+        :param buckets: (`tuple`) Upper bounds in seconds of the latency histograms
+        :param labels: (`dict`) Constant labels added to every exported sample (i.e. account name)
+        """
+
+        self.buckets = buckets
+        self.labels = dict(labels or {})
+        self.started = time.time()
+        self._endpoints = {}
+        self._parsers = {}
+
+    def get_endpoint(self, endpoint):
+        endpoint = endpoint or "unknown"
+        metrics = self._endpoints.get(endpoint)
+
+        if metrics is None:
+            metrics = self._endpoints[endpoint] = EndpointMetrics(endpoint, self.buckets)
+
+        return metrics
+
+    def record_request(self, endpoint, network_time, parse_time=None, size=0, retries=0, headers=None):
+        metrics = self.get_endpoint(endpoint)
+        metrics.requests += 1
+        metrics.bytes += size
+        metrics.retries += retries
+        metrics.network.observe(network_time)
+
+        if parse_time is not None:
+            metrics.parse.observe(parse_time)
+
+        remaining = headers.get("x-rate-limit-remaining") if headers is not None else None
+        if remaining is not None and str(remaining).isdigit():
+            metrics.rate_limit_remaining = int(remaining)
+
+    def record_error(self, endpoint, error):
+        errors = self.get_endpoint(endpoint).errors
+        name = error.__class__.__name__
+        errors[name] = errors.get(name, 0) + 1
+
+    def record_parse(self, parser, seconds, results=0):
+        stats = self._parsers.get(parser)
+
+        if stats is None:
+            stats = self._parsers[parser] = {"pages": Histogram(self.buckets), "results": 0}
+
+        stats["pages"].observe(seconds)
+        stats["results"] += results
+
+    def reset(self):
+        self.started = time.time()
+        self._endpoints = {}
+        self._parsers = {}
+
+    def snapshot(self):
+        return dict(
+            started=self.started,
+            endpoints={endpoint: metrics.to_dict() for endpoint, metrics in self._endpoints.items()},
+            parsers={
+                parser: dict(results=stats["results"], pages=stats["pages"].to_dict())
+                for parser, stats in self._parsers.items()
+            }
+        )
+
+    def _format_labels(self, **labels):
+        labels = dict(self.labels, **labels)
+
+        if not labels:
+            return ""
+
+        def escape(value):
+            return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+        return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels.items()) + "}"
+
+    def _histogram_lines(self, name, histogram, **labels):
+        lines = []
+
+        for bucket, count in histogram.cumulative():
+            lines.append(f"{name}_bucket{self._format_labels(**labels, le=bucket)} {count}")
+
+        lines.append(f"{name}_bucket{self._format_labels(**labels, le='+Inf')} {histogram.count}")
+        lines.append(f"{name}_sum{self._format_labels(**labels)} {histogram.sum}")
+        lines.append(f"{name}_count{self._format_labels(**labels)} {histogram.count}")
+        return lines
+
+    def to_prometheus(self, prefix="tweety"):
+        """
+        Export the metrics in Prometheus text exposition format
+
+        :param prefix: (`str`) Prefix of every metric name
+        :return: str
+        """
+
+        counters = (
+            ("requests_total", "counter", "Requests sent per endpoint", "requests"),
+            ("response_bytes_total", "counter", "Response bytes received per endpoint", "bytes"),
+            ("retries_total", "counter", "Retries per endpoint", "retries"),
+            ("rate_limit_remaining", "gauge", "Last x-rate-limit-remaining per endpoint", "rate_limit_remaining"),
+        )
+
+        lines = []
+        for name, metric_type, description, attribute in counters:
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} {metric_type}")
+
+            for endpoint, metrics in self._endpoints.items():
+                value = getattr(metrics, attribute)
+                if value is not None:
+                    lines.append(f"{prefix}_{name}{self._format_labels(endpoint=endpoint)} {value}")
+
+        lines.append(f"# HELP {prefix}_errors_total Errors per endpoint and error class")
+        lines.append(f"# TYPE {prefix}_errors_total counter")
+        for endpoint, metrics in self._endpoints.items():
+            for error, count in metrics.errors.items():
+                lines.append(f"{prefix}_errors_total{self._format_labels(endpoint=endpoint, error=error)} {count}")
+
+        for name, description in (("network", "Network time"), ("parse", "JSON parse time")):
+            lines.append(f"# HELP {prefix}_{name}_seconds {description} per endpoint")
+            lines.append(f"# TYPE {prefix}_{name}_seconds histogram")
+
+            for endpoint, metrics in self._endpoints.items():
+                lines.extend(self._histogram_lines(f"{prefix}_{name}_seconds", getattr(metrics, name), endpoint=endpoint))
+
+        lines.append(f"# HELP {prefix}_page_parse_seconds Time spent building the objects of a page")
+        lines.append(f"# TYPE {prefix}_page_parse_seconds histogram")
+        for parser, stats in self._parsers.items():
+            lines.extend(self._histogram_lines(f"{prefix}_page_parse_seconds", stats["pages"], parser=parser))
+
+        lines.append(f"# HELP {prefix}_page_results_total Objects built by the page parsers")
+        lines.append(f"# TYPE {prefix}_page_results_total counter")
+        for parser, stats in self._parsers.items():
+            lines.append(f"{prefix}_page_results_total{self._format_labels(parser=parser)} {stats['results']}")
+
+        return "\n".join(lines) + "\n"
+
+    def __repr__(self):
+        return "Metrics(endpoints={}, parsers={})".format(len(self._endpoints), len(self._parsers))
@@ -0,0 +1,391 @@
+import asyncio
+import inspect
+import time
+import warnings
+from .exceptions import RateLimitReached, LockedAccount, SuspendedAccount
+from .http import REQUEST_ENDPOINTS
+
+
+class AccountPool:
+    """
+    Pool of authenticated clients which routes every call to the account
+    with the most remaining quota for the endpoint the call will hit
+    """
+
+    DRAIN_EXCEPTIONS = (RateLimitReached, LockedAccount, SuspendedAccount)
+    def __init__(self, clients=None, wait_on_rate_limit=True):
+        """
+        :param clients: (`list[TwitterAsync]`) Already created clients to be pooled
+        :param wait_on_rate_limit: (`bool`) Wait for the first account to become available
+                                    when every account is drained, instead of raising `RateLimitReached`
+        """
+
+        self.wait_on_rate_limit = wait_on_rate_limit
+        self._clients = []
+        self._drained = {}
+        self._in_flight = {}
+        # Endpoint tag of every method, learnt from the requests the method sends
+        self._endpoints = {}
+
+        for client in clients or []:
+            self.add_client(client)
+
+    @classmethod
+    def from_sessions(cls, sessions, client_class=None, wait_on_rate_limit=True, **client_kwargs):
+        """
+        Create the pool from the saved sessions
+
+        :param sessions: (`list[str | Session]`) Session names or `FileSession`/`MemorySession` instances
+        :param client_class: (`type`) Async client class to create for every session, defaults to `TwitterAsync`
+        :param wait_on_rate_limit: (`bool`) Same as in `AccountPool`
+        :param client_kwargs: Keyword arguments passed to each client (i.e. `proxy`)
+        :return: AccountPool
+        """
+
+        if client_class is None:
+            from . import TwitterAsync
+            client_class = TwitterAsync
+
+        return cls([client_class(session, **client_kwargs) for session in sessions], wait_on_rate_limit)
+
+    @property
+    def clients(self):
+        return self._clients
+
+    @property
+    def active_clients(self):
+        return [client for client in self._clients if not self._is_drained(client, None)]
+
+    def add_client(self, client):
+        # Pool handles the waiting itself, clients should fail fast to let the call move to another account
+        client.http.scheduler.wait_on_rate_limit = False
+        self._clients.append(client)
+        self._drained[id(client)] = {}
+        self._in_flight[id(client)] = 0
+
+    def remove_client(self, client):
+        if client in self._clients:
+            self._clients.remove(client)
+        self._drained.pop(id(client), None)
+        self._in_flight.pop(id(client), None)
+
+    async def connect(self):
+        """
+        Connect every pooled client to its saved session,
+        clients which fail to connect are removed from the pool
+
+        :return: list[TwitterAsync]
+        """
+
+        results = await asyncio.gather(*[client.connect() for client in self._clients], return_exceptions=True)
+
+        for client, result in zip(list(self._clients), results):
+            if isinstance(result, Exception) or result is None:
+                warnings.warn(f"Removing '{client.session}' from the pool: {result}")
+                self.remove_client(client)
+
+        return self._clients
+
+    def drain(self, client, endpoint=None, until=None):
+        """
+        Stop routing the calls to the client
+
+        :param client: (`TwitterAsync`) Client to drain
+        :param endpoint: (`str`) Drain only for this endpoint, `None` for every endpoint
+        :param until: (`float`) Epoch time till the client is drained, `None` for forever
+        """
+
+        self._drained[id(client)][endpoint] = until
+
+    def _is_drained(self, client, endpoint):
+        drained = self._drained.get(id(client), {})
+        now = time.time()
+
+        for key in (None, endpoint):
+            if key not in drained:
+                continue
+
+            until = drained[key]
+            if until is None or until > now:
+                return True
+
+            del drained[key]
+
+        return False
+
+    def _drained_until(self, client, endpoint):
+        drained = self._drained.get(id(client), {})
+        until = [drained[key] for key in (None, endpoint) if key in drained]
+
+        if any(i is None for i in until):
+            return None
+
+        return max(until, default=time.time())
+
+    def get_endpoint(self, method_name):
+        """
+        Get the endpoint tag the method hits, `None` until the method has been called once
+
+        :param method_name: (`str`) Name of the client method
+        :return: str or None
+        """
+
+        return self._endpoints.get(method_name)
+
+    def _learn_endpoint(self, method_name, requested_endpoints):
+        # Methods may resolve a user first, the quota that matters is the one of their last request
+        if requested_endpoints:
+            self._endpoints[method_name] = requested_endpoints[-1]
+
+        return self._endpoints.get(method_name)
+
+    def remaining_quota(self, client, endpoint):
+        """
+        Get the remaining quota of the client for the endpoint, `inf` if it is not known yet
+
+        :param client: (`TwitterAsync`) Pooled client
+        :param endpoint: (`str`) Endpoint tag
+        :return: float
+        """
+
+        if endpoint is None:
+            return float("inf")
+
+        bucket = client.http.scheduler.buckets.get(endpoint)
+        if bucket is None or bucket.tokens is None:
+            return float("inf")
+
+        return bucket.tokens
+
+    def get_client(self, endpoint=None, exclude=None):
+        """
+        Get the client with the most remaining quota for the endpoint
+
+        :param endpoint: (`str`) Endpoint tag
+        :param exclude: (`list`) Clients which shouldn't be returned
+        :return: TwitterAsync or None
+        """
+
+        exclude = exclude or []
+        candidates = []
+        for client in self._clients:
+            if client in exclude or self._is_drained(client, endpoint):
+                continue
+
+            quota = self.remaining_quota(client, endpoint)
+            if quota <= 0:
+                continue
+
+            candidates.append((quota, -self._in_flight[id(client)], client))
+
+        if not candidates:
+            return None
+
+        return max(candidates, key=lambda item: item[:2])[2]
+
+    async def _wait_for_client(self, endpoint, exclude, last_error):
+        while True:
+            client = self.get_client(endpoint, exclude)
+            if client is not None:
+                return client
+
+            next_slots = []
+            for client in self._clients:
+                if client in exclude:
+                    continue
+
+                until = self._drained_until(client, endpoint)
+                if until is None:
+                    continue
+
+                if endpoint is not None:
+                    until = max(until, client.http.next_slot(endpoint))
+                next_slots.append(until)
+
+            if not next_slots or not self.wait_on_rate_limit:
+                if last_error is not None:
+                    raise last_error
+
+                raise RateLimitReached(
+                    error_code=88,
+                    error_name="RateLimitExceeded",
+                    response=None,
+                    message=f"No account in the pool is available for '{endpoint}'",
+                    retry_after=int(min(next_slots) - time.time()) if next_slots else None
+                )
+
+            await asyncio.sleep(max(min(next_slots) - time.time(), 0.1))
+
+    def _on_error(self, client, endpoint, error):
+        if isinstance(error, RateLimitReached):
+            retry_after = error.retry_after if error.retry_after and error.retry_after > 0 else 60
+            self.drain(client, endpoint, time.time() + retry_after)
+        else:
+            self.drain(client, None, None)
+
+    async def call(self, method_name, *args, **kwargs):
+        """
+        Call the coroutine method on the best available account,
+        moving to another account if it gets rate limited, locked or suspended
+
+        :param method_name: (`str`) Name of the client method i.e. `get_user_info`
+        :return: Result of the method
+        """
+
+        tried, last_error = [], None
+
+        while True:
+            endpoint = self.get_endpoint(method_name)
+            client = await self._wait_for_client(endpoint, tried, last_error)
+            self._in_flight[id(client)] += 1
+            requested_endpoints = []
+            token = REQUEST_ENDPOINTS.set(requested_endpoints)
+
+            try:
+                return await getattr(client, method_name)(*args, **kwargs)
+            except self.DRAIN_EXCEPTIONS as error:
+                endpoint = self._learn_endpoint(method_name, requested_endpoints)
+                self._on_error(client, endpoint, error)
+                last_error = error
+                if not isinstance(error, RateLimitReached):
+                    tried.append(client)
+            finally:
+                REQUEST_ENDPOINTS.reset(token)
+                self._learn_endpoint(method_name, requested_endpoints)
+
+                if id(client) in self._in_flight:
+                    self._in_flight[id(client)] -= 1
+
+    @staticmethod
+    def _bind_arguments(method, args, kwargs):
+        try:
+            bound = inspect.signature(method).bind(*args, **kwargs)
+        except (TypeError, ValueError):
+            return None
+
+        bound.apply_defaults()
+        if "cursor" not in bound.arguments:
+            return None
+
+        return bound
+
+    async def iterate(self, method_name, *args, **kwargs):
+        """
+        Iterate over the `iter_*` method on the best available account,
+        the pagination cursor moves to another account if the current one gets drained
+
+        :param method_name: (`str`) Name of the client generator method i.e. `iter_tweets`
+        """
+
+        tried, last_error = [], None
+        pages_done = 0
+
+        while True:
+            endpoint = self.get_endpoint(method_name)
+            client = await self._wait_for_client(endpoint, tried, last_error)
+            method = getattr(client, method_name)
+            bound = self._bind_arguments(method, args, kwargs)
+            self._in_flight[id(client)] += 1
+
+            if bound is None:
+                call_args, call_kwargs = args, kwargs
+            else:
+                call_args, call_kwargs = bound.args, bound.kwargs
+
+            generator_object = None
+            requested_endpoints = []
+            page_iterator = None
+            try:
+                page_iterator = method(*call_args, **call_kwargs).__aiter__()
+
+                while True:
+                    # Only set while the page is fetched, the caller's own requests between pages aren't counted
+                    token = REQUEST_ENDPOINTS.set(requested_endpoints)
+                    try:
+                        generator_object, results = await page_iterator.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    finally:
+                        REQUEST_ENDPOINTS.reset(token)
+                        self._learn_endpoint(method_name, requested_endpoints)
+
+                    pages_done += 1
+                    yield generator_object, results
+            except self.DRAIN_EXCEPTIONS as error:
+                endpoint = self._learn_endpoint(method_name, requested_endpoints)
+                self._on_error(client, endpoint, error)
+                last_error = error
+                if not isinstance(error, RateLimitReached):
+                    tried.append(client)
+
+                if bound is None:
+                    # Arguments couldn't be introspected, so the cursor can't be moved
+                    raise
+
+                if generator_object is not None:
+                    if not generator_object.is_next_page:
+                        return
+
+                    bound.arguments["cursor"] = generator_object.cursor
+
+                pages_left = bound.arguments.get("pages")
+                if isinstance(pages_left, int) and pages_left > 0:
+                    bound.arguments["pages"] = max(pages_left - pages_done, 0)
+                    if bound.arguments["pages"] == 0:
+                        return
+
+                args, kwargs, pages_done = bound.args, bound.kwargs, 0
+            finally:
+                if id(client) in self._in_flight:
+                    self._in_flight[id(client)] -= 1
+
+                # Generator of the drained account is abandoned (or the caller stopped early), close it
+                if page_iterator is not None and hasattr(page_iterator, "aclose"):
+                    await page_iterator.aclose()
+
+    async def _collect(self, iter_method_name, *args, **kwargs):
+        generator_object, all_results = None, []
+
+        async for generator_object, results in self.iterate(iter_method_name, *args, **kwargs):
+            all_results.extend(results)
+
+        if generator_object is not None:
+            result_attr = generator_object._RESULT_ATTR
+            setattr(generator_object, result_attr, all_results)
+            generator_object[result_attr] = all_results
+
+        return generator_object
+
+    def __getattr__(self, name):
+        if name.startswith("_") or not self._clients:
+            raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'")
+
+        attribute = getattr(self._clients[0], name)
+
+        if name.startswith("iter_"):
+            def iter_wrapper(*args, **kwargs):
+                return self.iterate(name, *args, **kwargs)
+
+            return iter_wrapper
+
+        if not inspect.iscoroutinefunction(attribute):
+            return attribute
+
+        iter_name = f"iter_{name[4:]}" if name.startswith("get_") else f"iter_{name}"
+        if hasattr(self._clients[0], iter_name):
+            # Paginated calls go through the generator so the cursor can move between accounts
+            async def collect_wrapper(*args, **kwargs):
+                return await self._collect(iter_name, *args, **kwargs)
+
+            return collect_wrapper
+
+        async def call_wrapper(*args, **kwargs):
+            return await self.call(name, *args, **kwargs)
+
+        return call_wrapper
+
+    def __len__(self):
+        return len(self._clients)
+
+    def __repr__(self):
+        return "AccountPool(clients={}, active={})".format(len(self._clients), len(self.active_clients))
@@ -0,0 +1,236 @@
+import time
+import httpx
+from .types.n_types import Proxy
+
+
+class ProxyStats:
+    """
+    Health of a single proxy, rates are exponentially weighted so a proxy can recover
+    """
+
+    ALPHA = 0.1
+
+    def __init__(self, proxy):
+        self.proxy = proxy
+        self.requests = 0
+        self.latency = 0.0
+        self.error_rate = 0.0
+        self.blocked_rate = 0.0
+        self.degraded_until = None
+
+    def _ewma(self, current, value):
+        if self.requests == 1:
+            return float(value)
+        return current + self.ALPHA * (value - current)
+
+    def record(self, latency=None, status_code=None, error=False):
+        self.requests += 1
+        self.error_rate = self._ewma(self.error_rate, 1 if error or (status_code and status_code >= 500) else 0)
+        self.blocked_rate = self._ewma(self.blocked_rate, 1 if status_code in (403, 429) else 0)
+
+        if latency is not None:
+            self.latency = self._ewma(self.latency, latency) if self.latency else latency
+
+    def reset(self):
+        self.requests = 0
+        self.latency = self.error_rate = self.blocked_rate = 0.0
+        self.degraded_until = None
+
+    @property
+    def score(self):
+        # Lower is better
+        return self.latency * (1 + self.error_rate * 4 + self.blocked_rate * 4)
+
+    def to_dict(self):
+        return dict(
+            proxy=str(self.proxy),
+            requests=self.requests,
+            latency=round(self.latency, 4),
+            error_rate=round(self.error_rate, 4),
+            blocked_rate=round(self.blocked_rate, 4),
+            degraded_until=self.degraded_until
+        )
+
+    def __repr__(self):
+        return "ProxyStats(proxy={}, latency={}, error_rate={}, blocked_rate={})".format(
+            self.proxy, round(self.latency, 4), round(self.error_rate, 4), round(self.blocked_rate, 4)
+        )
+
+
+class ProxyPoolTransport(httpx.AsyncBaseTransport):
+    """
+    Transport of a single client, sends every request through the proxy its key is bound to
+    """
+
+    def __init__(self, pool, key):
+        self._pool = pool
+        self.key = key
+
+    @property
+    def proxy(self):
+        return self._pool.get_proxy(self.key)
+
+    async def handle_async_request(self, request):
+        proxy = self._pool.get_proxy(self.key)
+        transport = self._pool.get_proxy_transport(proxy)
+        started = time.perf_counter()
+
+        try:
+            response = await transport.handle_async_request(request)
+        except Exception:
+            self._pool.record(proxy, error=True)
+            raise
+
+        self._pool.record(proxy, time.perf_counter() - started, response.status_code)
+        return response
+
+    async def aclose(self):
+        # Proxy transports are shared with other clients, they are closed by the pool
+        self._pool.release(self.key)
+
+
+class ProxyPool:
+    """
+    Pool of proxies with one pooled HTTP/2 transport per proxy.
+    Accounts (or guest sessions) are bound to a proxy stickily and moved
+    to a healthier one when their proxy degrades
+    """
+
+    def __init__(
+            self,
+            proxies,
+            max_error_rate=0.5,
+            max_blocked_rate=0.5,
+            max_latency=None,
+            min_requests=5,
+            cooldown=300,
+            **transport_kwargs
+    ):
+        """
+        :param proxies: (`list[Proxy | str]`) Proxies to be pooled
+        :param max_error_rate: (`float`) Proxy is degraded when its (weighted) error rate goes above it
+        :param max_blocked_rate: (`float`) Proxy is degraded when its (weighted) 403/429 rate goes above it
+        :param max_latency: (`float`) Proxy is degraded when its (weighted) latency in seconds goes above it
+        :param min_requests: (`int`) Number of requests a proxy must serve before it can be degraded
+        :param cooldown: (`int`) Seconds a degraded proxy won't receive new assignments
+        :param transport_kwargs: Keyword arguments for each `httpx.AsyncHTTPTransport`
+        """
+
+        if not proxies:
+            raise ValueError("At least one proxy is required")
+
+        self.max_error_rate = max_error_rate
+        self.max_blocked_rate = max_blocked_rate
+        self.max_latency = max_latency
+        self.min_requests = min_requests
+        self.cooldown = cooldown
+        self._transport_kwargs = transport_kwargs
+        self._transport_kwargs.setdefault("http2", True)
+        self._proxies = [str(proxy) if isinstance(proxy, Proxy) else proxy for proxy in proxies]
+        self._stats = {proxy: ProxyStats(proxy) for proxy in self._proxies}
+        self._transports = {}
+        self._assignments = {}
+
+    @property
+    def proxies(self):
+        return self._proxies
+
+    @property
+    def assignments(self):
+        return self._assignments
+
+    def get_transport(self, key):
+        """
+        Get the transport to be used by the `httpx.AsyncClient` of an account
+
+        :param key: (`str`) Sticky key i.e. session name of the account
+        :return: ProxyPoolTransport
+        """
+
+        return ProxyPoolTransport(self, key)
+
+    def get_proxy_transport(self, proxy):
+        transport = self._transports.get(proxy)
+
+        if transport is None:
+            transport = self._transports[proxy] = httpx.AsyncHTTPTransport(proxy=proxy, **self._transport_kwargs)
+
+        return transport
+
+    def is_degraded(self, proxy):
+        stats = self._stats[proxy]
+
+        if stats.degraded_until is not None:
+            if stats.degraded_until > time.time():
+                return True
+
+            # Cooldown is over, give it another chance
+            stats.reset()
+
+        if stats.requests < self.min_requests:
+            return False
+
+        degraded = (
+            stats.error_rate > self.max_error_rate
+            or stats.blocked_rate > self.max_blocked_rate
+            or (self.max_latency is not None and stats.latency > self.max_latency)
+        )
+
+        if degraded:
+            stats.degraded_until = time.time() + self.cooldown
+
+        return degraded
+
+    def _get_best_proxy(self):
+        load = {proxy: 0 for proxy in self._proxies}
+        for proxy in self._assignments.values():
+            if proxy in load:
+                load[proxy] += 1
+
+        healthy = [proxy for proxy in self._proxies if not self.is_degraded(proxy)]
+
+        # Every proxy is degraded, use the one which will recover first
+        if not healthy:
+            return min(self._proxies, key=lambda p: self._stats[p].degraded_until or 0)
+
+        return min(healthy, key=lambda p: (load[p], self._stats[p].score))
+
+    def get_proxy(self, key):
+        """
+        Get the proxy bound to the key, binding (or re-binding) it when required
+
+        :param key: (`str`) Sticky key
+        :return: str
+        """
+
+        proxy = self._assignments.get(key)
+
+        if proxy is None or self.is_degraded(proxy):
+            self._assignments.pop(key, None)
+            proxy = self._assignments[key] = self._get_best_proxy()
+
+        return proxy
+
+    def release(self, key):
+        self._assignments.pop(key, None)
+
+    def record(self, proxy, latency=None, status_code=None, error=False):
+        stats = self._stats.get(proxy)
+
+        if stats is not None:
+            stats.record(latency, status_code, error)
+
+    def stats(self):
+        return {proxy: stats.to_dict() for proxy, stats in self._stats.items()}
+
+    async def aclose(self):
+        for transport in self._transports.values():
+            await transport.aclose()
+
+        self._transports = {}
+
+    def __len__(self):
+        return len(self._proxies)
+
+    def __repr__(self):
+        return "ProxyPool(proxies={}, assigned={})".format(len(self._proxies), len(self._assignments))
@@ -0,0 +1,181 @@
+import asyncio
+import time
+from .exceptions import RateLimitReached
+
+
+class RateLimitBucket:
+    """
+    Token bucket of a single endpoint, fed by the `x-rate-limit-*` response headers
+    """
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.limit = None
+        self.remaining = None
+        self.reset = None
+        self.in_flight = 0
+        self._tokens = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def lock(self):
+        return self._lock
+
+    @property
+    def tokens(self):
+        if self.reset is not None and time.time() >= self.reset:
+            # Window is over, a fresh quota is available (if we know it)
+            self.reset = None
+            self._tokens = None if self.limit is None else max(self.limit - self.in_flight, 0)
+
+        return self._tokens
+
+    def next_slot(self):
+        tokens = self.tokens
+
+        if tokens is None or tokens > 0:
+            return time.time()
+
+        if self.reset is None:
+            # Quota exhausted by in-flight requests only, retry as soon as one of them returns
+            return time.time()
+
+        return float(self.reset)
+
+    def reserve(self):
+        self.in_flight += 1
+        if self._tokens is not None:
+            self._tokens = max(self._tokens - 1, 0)
+
+    def release(self):
+        self.in_flight = max(self.in_flight - 1, 0)
+
+    def update(self, remaining, reset, limit=None):
+        self.remaining = remaining
+        self.reset = reset
+        self.limit = limit if limit is not None else self.limit
+        self._tokens = max(remaining - self.in_flight, 0)
+
+    def to_dict(self):
+        return dict(
+            endpoint=self.endpoint,
+            limit=self.limit,
+            limit_remaining=self.remaining,
+            limit_reset=self.reset,
+            in_flight=self.in_flight,
+            next_slot=self.next_slot()
+        )
+
+    def __repr__(self):
+        return "RateLimitBucket(endpoint={}, remaining={}, reset={})".format(
+            self.endpoint, self.remaining, self.reset
+        )
+
+
+class RateLimitScheduler:
+    """
+    Per-endpoint scheduler which delays the requests before they are sent
+    when the quota of that endpoint is known to be exhausted
+    """
+
+    def __init__(self, wait_on_rate_limit=True, max_wait=None):
+        """
+        :param wait_on_rate_limit: (`bool`) Wait for the next slot instead of raising `RateLimitReached`
+        :param max_wait: (`int`, `float`) Raise `RateLimitReached` if the next slot is further than these many seconds
+        """
+
+        self.wait_on_rate_limit = wait_on_rate_limit
+        self.max_wait = max_wait
+        self._buckets = {}
+
+    @property
+    def buckets(self):
+        return self._buckets
+
+    def get_bucket(self, endpoint):
+        bucket = self._buckets.get(endpoint)
+
+        if bucket is None:
+            bucket = self._buckets[endpoint] = RateLimitBucket(endpoint)
+
+        return bucket
+
+    def next_slot(self, endpoint):
+        """
+        Get the epoch time at which the next request to the endpoint can be sent
+
+        :param endpoint: (`str`) Endpoint key
+        :return: float
+        """
+
+        bucket = self._buckets.get(endpoint)
+
+        if bucket is None:
+            return time.time()
+
+        return bucket.next_slot()
+
+    async def wait_for_slot(self, endpoint):
+        """
+        Wait until the next slot of the endpoint is available and return its time
+
+        :param endpoint: (`str`) Endpoint key
+        :return: float
+        """
+
+        next_slot = self.next_slot(endpoint)
+        wait_time = next_slot - time.time()
+
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+
+        return next_slot
+
+    async def acquire(self, endpoint):
+        bucket = self.get_bucket(endpoint)
+
+        # Lock is held while sleeping so the waiting requests leave in the order they came
+        async with bucket.lock:
+            while True:
+                wait_time = bucket.next_slot() - time.time()
+
+                if wait_time <= 0:
+                    break
+
+                if not self.wait_on_rate_limit or (self.max_wait is not None and wait_time > self.max_wait):
+                    raise RateLimitReached(
+                        error_code=88,
+                        error_name="RateLimitExceeded",
+                        response=None,
+                        message=f"Rate Limit of '{endpoint}' is exhausted, next slot in {int(wait_time)} seconds",
+                        retry_after=int(wait_time)
+                    )
+
+                await asyncio.sleep(wait_time)
+
+            bucket.reserve()
+
+        return bucket
+
+    def release(self, endpoint, headers=None, status_code=None):
+        bucket = self.get_bucket(endpoint)
+        bucket.release()
+
+        if headers is None:
+            return bucket
+
+        if all(key in headers for key in ['x-rate-limit-reset', 'x-rate-limit-remaining']):
+            limit = headers.get('x-rate-limit-limit')
+            bucket.update(
+                int(headers['x-rate-limit-remaining']),
+                int(headers['x-rate-limit-reset']),
+                int(limit) if limit else None
+            )
+        elif status_code == 429 and bucket.reset is None:
+            # No hint from the server, back off for a short while
+            bucket.update(0, int(time.time()) + 60)
+
+        return bucket
+
+    def to_dict(self):
+        return {endpoint: bucket.to_dict() for endpoint, bucket in self._buckets.items()}
@@ -0,0 +1,175 @@
+import random
+import time
+import httpx
+
+RETRY_CONNECT = "connect"
+RETRY_TIMEOUT = "timeout"
+RETRY_STREAM_RESET = "stream_reset"
+RETRY_TRANSPORT = "transport"
+RETRY_SERVER_ERROR = "server_error"
+RETRY_RATE_LIMIT = "rate_limit"
+
+IDEMPOTENT_METHODS = ("GET", "HEAD")
+
+# Request may have reached the server, replaying a non-idempotent one could repeat its side effects
+UNSAFE_RETRY_CLASSES = (RETRY_TIMEOUT, RETRY_STREAM_RESET, RETRY_TRANSPORT, RETRY_SERVER_ERROR)
+
+
+class RetryState:
+    """
+    Retry bookkeeping of a single request
+    """
+
+    def __init__(self, policy, idempotent=True):
+        self.policy = policy
+        self.idempotent = idempotent
+        self.attempts = 0
+        self.retries = {}
+        self.last_error_class = None
+
+    def next_delay(self, response=None, error=None):
+        """
+        Get the seconds to wait before retrying the request, `None` if it shouldn't be retried
+
+        :param response: (`httpx.Response`) Response of the last attempt
+        :param error: (`Exception`) Exception raised by the last attempt
+        :return: float or None
+        """
+
+        self.attempts += 1
+        error_class = self.policy.classify(response, error, self.idempotent)
+        self.last_error_class = error_class
+
+        if error_class is None or self.attempts >= self.policy.max_attempts:
+            return None
+
+        retries = self.retries.get(error_class, 0)
+        if retries >= self.policy.budgets.get(error_class, 0):
+            return None
+
+        self.retries[error_class] = retries + 1
+
+        if error_class == RETRY_RATE_LIMIT:
+            delay = self.policy.get_rate_limit_delay(response)
+        else:
+            delay = self.policy.get_backoff(retries)
+
+        if delay is None or delay > self.policy.max_delay:
+            return None
+
+        return delay
+
+
+class RetryPolicy:
+    """
+    Retry policy with exponential backoff and full jitter,
+    every class of error has its own retry budget
+    """
+
+    DEFAULT_BUDGETS = {
+        RETRY_CONNECT: 5,
+        RETRY_TIMEOUT: 3,
+        RETRY_STREAM_RESET: 3,
+        RETRY_TRANSPORT: 2,
+        RETRY_SERVER_ERROR: 3,
+        RETRY_RATE_LIMIT: 1,
+    }
+
+    def __init__(self, max_attempts=10, budgets=None, base_delay=0.5, max_backoff=30, max_delay=60, jitter=True):
+        """
+        :param max_attempts: (`int`) Maximum number of attempts of a request, whatever the errors are
+        :param budgets: (`dict`) Number of retries per error class, merged into `DEFAULT_BUDGETS`
+        :param base_delay: (`float`) Delay of the first backoff in seconds
+        :param max_backoff: (`float`) Upper limit of a backoff in seconds
+        :param max_delay: (`float`) Don't retry if the required delay is more than these seconds (i.e. far rate limit reset)
+        :param jitter: (`bool`) Randomize the backoff between zero and its computed value
+        """
+
+        self.max_attempts = max_attempts
+        self.budgets = dict(self.DEFAULT_BUDGETS)
+        self.budgets.update(budgets or {})
+        self.base_delay = base_delay
+        self.max_backoff = max_backoff
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def new_state(self, method="GET", idempotent=None):
+        """
+        :param method: (`str`) Method of the request
+        :param idempotent: (`bool`) Request can be repeated safely, defaults to True only for GET and HEAD
+        """
+
+        if idempotent is None:
+            idempotent = str(method).upper() in IDEMPOTENT_METHODS
+
+        return RetryState(self, idempotent)
+
+    @classmethod
+    def classify(cls, response=None, error=None, idempotent=True):
+        """
+        Get the retry class of the attempt, `None` if it isn't retryable.
+        Only connection errors and rate limits are retried if the request isn't idempotent
+
+        :return: str or None
+        """
+
+        error_class = cls._classify(response, error)
+
+        if not idempotent and error_class in UNSAFE_RETRY_CLASSES:
+            return None
+
+        return error_class
+
+    @staticmethod
+    def _classify(response=None, error=None):
+        if error is not None:
+            # Nothing was sent yet
+            if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.ProxyError, httpx.PoolTimeout)):
+                return RETRY_CONNECT
+
+            if isinstance(error, (httpx.ReadTimeout, httpx.WriteTimeout)):
+                return RETRY_TIMEOUT
+
+            if isinstance(error, (httpx.RemoteProtocolError, httpx.ReadError)) or "StreamReset" in type(error).__name__:
+                return RETRY_STREAM_RESET
+
+            if isinstance(error, httpx.TransportError):
+                return RETRY_TRANSPORT
+
+            return None
+
+        if response is None:
+            return None
+
+        if response.status_code == 429:
+            return RETRY_RATE_LIMIT
+
+        if response.status_code >= 500:
+            return RETRY_SERVER_ERROR
+
+        return None
+
+    def get_backoff(self, retry):
+        backoff = min(self.max_backoff, self.base_delay * (2 ** retry))
+
+        if self.jitter:
+            return random.uniform(0, backoff)
+
+        return backoff
+
+    def get_rate_limit_delay(self, response):
+        reset = response.headers.get("x-rate-limit-reset") if response is not None else None
+
+        if reset and str(reset).isdigit():
+            return max(int(reset) - time.time(), 0) + random.uniform(0, self.base_delay)
+
+        return self.get_backoff(self.budgets.get(RETRY_RATE_LIMIT, 0))
+
+
+class NoRetryPolicy(RetryPolicy):
+    """
+    Policy which never retries
+    """
+
+    def __init__(self):
+        super().__init__(max_attempts=1, budgets={})
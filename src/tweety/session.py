@@ -8,6 +8,7 @@ class Session:
         self.user = None
         self.logged_in = False
         self.cookies = {}
+        self.bootstrap = {}
 
     def cookies_dict(self):
 
@@ -25,7 +26,7 @@ class Session:
 
         return result
 
-    async def save_session(self, cookies, user):
+    async def save_session(self, cookies, user, bootstrap=None):
         self.logged_in = True
 
         if hasattr(cookies, "to_dict"):
@@ -33,6 +34,7 @@ class Session:
 
         self.cookies = cookies or self.cookies
         self.user = user or self.user
+        self.bootstrap = bootstrap or self.bootstrap
 
     def __str__(self):
         if isinstance(self.cookies, dict):
@@ -49,7 +51,7 @@ class MemorySession(Session):
         self._client = client
         return self
 
-    async def save_session(self, cookies, user):
+    async def save_session(self, cookies, user, bootstrap=None):
         self.logged_in = True
 
         if hasattr(cookies, "to_dict"):
@@ -57,6 +59,7 @@ class MemorySession(Session):
 
         self.cookies = cookies or self.cookies
         self.user = user or self.user
+        self.bootstrap = bootstrap or self.bootstrap
 
 
 class FileSession(Session):
@@ -72,9 +75,9 @@ class FileSession(Session):
         directory = os.path.dirname(session_path) or os.getcwd()
         return os.path.abspath(os.path.join(directory, f"{_session}.tw_session"))
 
-    async def save_session(self, cookies, user):
-        await super().save_session(cookies, user)
-        session_data = {"cookies": self.cookies, "user": self.user}
+    async def save_session(self, cookies, user, bootstrap=None):
+        await super().save_session(cookies, user, bootstrap)
+        session_data = {"cookies": self.cookies, "user": self.user, "bootstrap": self.bootstrap}
 
         with open(self.session_file_path, "w") as f:
             json.dump(session_data, f, default=str)
@@ -85,6 +88,7 @@ class FileSession(Session):
                 session_data = json.load(f)
                 self.cookies = session_data['cookies']
                 self.user = session_data.get('user', {})
+                self.bootstrap = session_data.get('bootstrap') or {}
 
             self.logged_in = True
 
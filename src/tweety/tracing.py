@@ -0,0 +1,138 @@
+import contextvars
+import time
+
+CURRENT_SPAN = contextvars.ContextVar("tweety_current_span", default=None)
+
+
+class Span:
+    """
+    Timed phase of the client, spans opened inside another span are its children
+    """
+
+    __slots__ = ("name", "attributes", "parent", "started", "ended", "error")
+
+    def __init__(self, name, attributes=None, parent=None):
+        self.name = name
+        self.attributes = attributes or {}
+        self.parent = parent
+        self.started = time.perf_counter()
+        self.ended = None
+        self.error = None
+
+    @property
+    def duration(self):
+        return (self.ended or time.perf_counter()) - self.started
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def __repr__(self):
+        return "Span(name={}, duration={})".format(self.name, round(self.duration, 6))
+
+
+class BaseTracer:
+    """
+    Receives the spans of a client, subclass it to export them (i.e. to OpenTelemetry)
+    """
+
+    def on_start(self, span):
+        pass
+
+    def on_end(self, span):
+        pass
+
+
+class CallbackTracer(BaseTracer):
+    def __init__(self, on_start=None, on_end=None):
+        """
+        :param on_start: (`Callable[[Span], None]`) Called when a span starts
+        :param on_end: (`Callable[[Span], None]`) Called when a span ends
+        """
+
+        self._on_start = on_start
+        self._on_end = on_end
+
+    def on_start(self, span):
+        if self._on_start is not None:
+            self._on_start(span)
+
+    def on_end(self, span):
+        if self._on_end is not None:
+            self._on_end(span)
+
+
+class _NullSpanContext:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_SPAN_CONTEXT = _NullSpanContext()
+
+
+class _SpanContext:
+    __slots__ = ("_tracing", "_span", "_token")
+
+    def __init__(self, tracing, span):
+        self._tracing = tracing
+        self._span = span
+        self._token = None
+
+    def __enter__(self):
+        self._token = CURRENT_SPAN.set(self._span)
+        self._tracing.dispatch("on_start", self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._span.ended = time.perf_counter()
+        self._span.error = exc_value
+        CURRENT_SPAN.reset(self._token)
+        self._tracing.dispatch("on_end", self._span)
+        return False
+
+
+class Tracing:
+    """
+    Tracers of a client, spans cost nothing when no tracer is added
+    """
+
+    def __init__(self):
+        self._tracers = []
+
+    @property
+    def tracers(self):
+        return self._tracers
+
+    def add_tracer(self, tracer):
+        self._tracers.append(tracer)
+        return tracer
+
+    def remove_tracer(self, tracer):
+        if tracer in self._tracers:
+            self._tracers.remove(tracer)
+
+    def span(self, name, **attributes):
+        """
+        Context manager which times the phase, yields the `Span` (or `None` if there isn't any tracer)
+
+        :param name: (`str`) Name of the phase
+        :param attributes: Attributes of the span
+        """
+
+        if not self._tracers:
+            return NULL_SPAN_CONTEXT
+
+        return _SpanContext(self, Span(name, attributes, CURRENT_SPAN.get()))
+
+    def dispatch(self, event, span):
+        for tracer in self._tracers:
+            try:
+                getattr(tracer, event)(span)
+            except Exception:
+                # A broken exporter shouldn't break the requests
+                pass
+
+    def __len__(self):
+        return len(self._tracers)
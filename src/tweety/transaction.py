@@ -2,8 +2,10 @@
 Credit : https://github.com/iSarabjitDhiman/TweeterPy/tree/master/tweeterpy/tid
 """
 
+import os
 import re
-import bs4
+import asyncio
+import json
 import math
 import time
 import random
@@ -13,11 +15,11 @@ import httpx
 from functools import reduce
 from typing import Union, List
 from .utils import float_to_hex, is_odd, base64_encode
+from .homepage import HomePage, ON_DEMAND_FILE_REGEX
 
-ON_DEMAND_FILE_REGEX = re.compile(
-    r"""['|\"]{1}ondemand\.s['|\"]{1}:\s*['|\"]{1}([\w]*)['|\"]{1}""", flags=(re.VERBOSE | re.MULTILINE))
 INDICES_REGEX = re.compile(
     r"""(\(\w{1}\[(\d{1,2})\],\s*16\))+""", flags=(re.VERBOSE | re.MULTILINE))
+XOR_TABLES = [bytes(i ^ key for i in range(256)) for key in range(256)]
 
 
 def interpolate(from_list: List[Union[float, int]], to_list: List[Union[float, int]], f: Union[float, int]):
@@ -94,59 +96,281 @@ class Cubic:
         return 3.0 * a * (1 - m) * (1 - m) * m + 3.0 * b * (1 - m) * m * m + m * m * m
 
 
+class TransactionCache:
+    """
+    Cache of the animation key indices parsed from the `ondemand.s` file,
+    keyed by the hash of the file so a new deployment invalidates it
+    """
+
+    def __init__(self, ttl=3600, path=None):
+        """
+        :param ttl: (`int`) Seconds for which the cached indices are valid
+        :param path: (`str`) Optional JSON file to persist the cache across processes
+        """
+
+        self.ttl = ttl
+        self.path = os.path.abspath(path) if path else None
+        self._data = {}
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, "r") as f:
+                self._data = json.load(f)
+        except (OSError, ValueError):
+            self._data = {}
+
+    def _save(self):
+        if not self.path:
+            return
+
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self._data, f)
+        os.replace(temp_path, self.path)
+
+    def get(self, on_demand_hash):
+        item = self._data.get(on_demand_hash)
+
+        if item is None:
+            return None
+
+        if item.get("expires", 0) <= time.time():
+            self._data.pop(on_demand_hash, None)
+            return None
+
+        return item["state"]
+
+    def set(self, on_demand_hash, state):
+        self._data = {k: v for k, v in self._data.items() if v.get("expires", 0) > time.time()}
+        self._data[on_demand_hash] = {"expires": time.time() + self.ttl, "state": state}
+        self._save()
+
+    def clear(self):
+        self._data = {}
+        self._save()
+
+
+DEFAULT_TRANSACTION_CACHE = TransactionCache()
+
+
+class TransactionRegistry:
+    """
+    Process wide registry of the bootstrapped generators, clients with the same key
+    share one generator so the home page is fetched once for all of them
+    """
+
+    DEFAULT_KEY = "default"
+
+    def __init__(self, ttl=3600, per_proxy=False):
+        """
+        :param ttl: (`int`) Seconds after which a generator is bootstrapped again
+        :param per_proxy: (`bool`) Bootstrap separately for every proxy instead of sharing one generator
+        """
+
+        self.ttl = ttl
+        self.per_proxy = per_proxy
+        self._entries = {}
+        self._pending = {}
+
+    def get_key(self, proxy=None):
+        if self.per_proxy and proxy:
+            return str(proxy)
+
+        return self.DEFAULT_KEY
+
+    def get_entry(self, key):
+        entry = self._entries.get(key)
+
+        if entry is None or entry[1] <= time.time():
+            return None
+
+        return entry
+
+    def put(self, key, generator, expires=None):
+        if self.get_entry(key) is None:
+            self._entries[key] = (generator, expires or time.time() + self.ttl)
+
+        return self._entries[key]
+
+    async def get(self, key, factory):
+        """
+        Get the generator of the key, bootstrapping it with the factory if required.
+        Concurrent callers of the same key wait for a single bootstrap
+
+        :param key: (`str`) Registry key
+        :param factory: (`coroutine function`) Creates a new `TransactionGenerator`
+        :return: tuple[TransactionGenerator, float]
+        """
+
+        entry = self.get_entry(key)
+        if entry is not None:
+            return entry
+
+        pending = self._pending.get(key)
+
+        # Sync clients run every call in a new event loop, a task of the older loop never finishes
+        if pending is None or pending.done() or pending.get_loop() is not asyncio.get_running_loop():
+            pending = self._pending[key] = asyncio.ensure_future(factory())
+
+        try:
+            generator = await asyncio.shield(pending)
+        finally:
+            if pending.done() and self._pending.get(key) is pending:
+                self._pending.pop(key, None)
+
+        return self.put(key, generator)
+
+    def invalidate(self, key, generator=None):
+        """
+        Drop the generator of the key, only if it is still the given one.
+        Many clients noticing the same rejected generator trigger only one refresh
+
+        :param key: (`str`) Registry key
+        :param generator: (`TransactionGenerator`) Generator which got rejected
+        """
+
+        entry = self._entries.get(key)
+
+        if entry is not None and (generator is None or entry[0] is generator):
+            self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries = {}
+
+
+DEFAULT_TRANSACTION_REGISTRY = TransactionRegistry()
+
+
 class TransactionGenerator:
     DEFAULT_KEYWORD = "obfiowerehiring"
     ADDITIONAL_RANDOM_NUMBER = 3
     DEFAULT_ROW_INDEX = None
     DEFAULT_KEY_BYTES_INDICES = None
+    ON_DEMAND_FILE_URL = "https://abs.twimg.com/responsive-web/client-web/ondemand.s.{}a.js"
+
+    def __init__(self, home_page_html: Union[HomePage, httpx.Response], state: dict):
+        """
+        Use `create` to build a generator from a home page, the indices of the `ondemand.s` file
+        are fetched there with the async client
+
+        :param home_page_html: (`HomePage`, `bs4.BeautifulSoup`, `httpx.Response`) Twitter Home Page, not required if the state has the keys
+        :param state: (`dict`) State of `get_state` or the indices of `create`
+        """
+
+        if not state:
+            raise ValueError("State is required, use 'TransactionGenerator.create' to build it from the home page")
+
+        self._key_states = {}
+        self.on_demand_hash = None
+        # Home page isn't required if the state already has the key material
+        restored = state.get("key") and state.get("animation_key")
+        self.home_page_html = self.validate_response(home_page_html) if home_page_html is not None or not restored else None
+        self.load_state(state)
+
+    @classmethod
+    async def create(
+            cls,
+            home_page_html: Union[HomePage, httpx.Response],
+            http_client: httpx.AsyncClient,
+            cache: TransactionCache = None
+    ):
+        """
+        Create the generator without blocking the event loop,
+        `ondemand.s` file is fetched only if its indices aren't in the cache
+
+        :param home_page_html: (`HomePage`, `bs4.BeautifulSoup`, `httpx.Response`) Twitter Home Page
+        :param http_client: (`httpx.AsyncClient`) Client used to get the `ondemand.s` file
+        :param cache: (`TransactionCache`) Cache of the animation key indices
+        :return: TransactionGenerator
+        """
+
+        home_page_html = HomePage.from_response(home_page_html) if isinstance(home_page_html, httpx.Response) else home_page_html
+        on_demand_hash = cls.get_on_demand_hash(home_page_html)
+        state = cache.get(on_demand_hash) if cache is not None and on_demand_hash else None
+
+        if state is None:
+            if not on_demand_hash:
+                raise Exception("Couldn't get animation key indices")
+
+            on_demand_file_response = await http_client.get(cls.ON_DEMAND_FILE_URL.format(on_demand_hash))
+
+            row_index, key_bytes_indices = cls.parse_indices(on_demand_file_response.text)
+            state = {"row_index": row_index, "key_bytes_indices": key_bytes_indices}
+
+            if cache is not None:
+                cache.set(on_demand_hash, state)
+
+        # Verification key changes with every home page, only the indices are reused
+        return cls(home_page_html, state=dict(state, on_demand_hash=on_demand_hash, key=None, animation_key=None))
+
+    def get_state(self):
+        return {
+            "on_demand_hash": self.on_demand_hash,
+            "row_index": self.DEFAULT_ROW_INDEX,
+            "key_bytes_indices": list(self.DEFAULT_KEY_BYTES_INDICES),
+            "key": self.key,
+            "animation_key": self.animation_key
+        }
+
+    def load_state(self, state: dict):
+        self.on_demand_hash = state.get("on_demand_hash", self.on_demand_hash)
+        self.DEFAULT_ROW_INDEX = state["row_index"]
+        self.DEFAULT_KEY_BYTES_INDICES = list(state["key_bytes_indices"])
+        self.key = state.get("key") or self.get_key(response=self.home_page_html)
+        self.key_bytes = self.get_key_bytes(key=self.key)
+        self.animation_key = state.get("animation_key") or self.get_animation_key(key_bytes=self.key_bytes, response=self.home_page_html)
+
+    @staticmethod
+    def get_on_demand_hash(home_page_html):
+        on_demand_file = ON_DEMAND_FILE_REGEX.search(str(home_page_html))
+        return on_demand_file.group(1) if on_demand_file else None
 
-    def __init__(self, home_page_html: Union[bs4.BeautifulSoup, httpx.Response]):
+    @staticmethod
+    def parse_indices(on_demand_file_text):
+        key_byte_indices = [int(item.group(2)) for item in INDICES_REGEX.finditer(str(on_demand_file_text))]
 
-        self.home_page_html = self.validate_response(home_page_html)
-        self.DEFAULT_ROW_INDEX, self.DEFAULT_KEY_BYTES_INDICES = self.get_indices(self.home_page_html)
-        self.key = self.get_key(response=self.home_page_html)
-        self.key_bytes = self.get_key_bytes(key=self.key)
-        self.animation_key = self.get_animation_key(key_bytes=self.key_bytes, response=self.home_page_html)
-
-    def get_indices(self, home_page_html=None):
-        key_byte_indices = []
-        response = self.validate_response(home_page_html) or self.home_page_html
-        on_demand_file = ON_DEMAND_FILE_REGEX.search(str(response))
-        if on_demand_file:
-            on_demand_file_url = f"https://abs.twimg.com/responsive-web/client-web/ondemand.s.{on_demand_file.group(1)}a.js"
-            on_demand_file_response = httpx.get(on_demand_file_url)
-            key_byte_indices_match = INDICES_REGEX.finditer(
-                str(on_demand_file_response.text))
-            for item in key_byte_indices_match:
-                key_byte_indices.append(item.group(2))
         if not key_byte_indices:
             raise Exception("Couldn't get animation key indices")
-        key_byte_indices = list(map(int, key_byte_indices))
+
         return key_byte_indices[0], key_byte_indices[1:]
 
-    def validate_response(self, response: Union[bs4.BeautifulSoup, httpx.Response]):
-        if not isinstance(response, (bs4.BeautifulSoup, httpx.Response)):
+    def validate_response(self, response: Union[HomePage, httpx.Response]):
+        # BeautifulSoup documents are still accepted, without importing bs4 for the check
+        if not isinstance(response, (HomePage, httpx.Response)) and not hasattr(response, "select_one"):
             raise Exception("Unable to get Twitter Home Page")
-        return response if isinstance(response, bs4.BeautifulSoup) else bs4.BeautifulSoup(response.content, 'lxml')
+        return HomePage.from_response(response) if isinstance(response, httpx.Response) else response
 
     def get_key(self, response=None):
         response = self.validate_response(response) or self.home_page_html
-        element = response.select_one("[name='twitter-site-verification']")
-        if not element:
+        if isinstance(response, HomePage):
+            key = response.verification_key
+        else:
+            element = response.select_one("[name='twitter-site-verification']")
+            key = element.get("content") if element else None
+        if not key:
             raise Exception("Couldn't get twitter site verification code")
-        return element.get("content")
+        return key
 
     def get_key_bytes(self, key: str):
         return list(base64.b64decode(bytes(key, 'utf-8')))
 
     def get_frames(self, response=None):
         response = self.validate_response(response) or self.home_page_html
+        if isinstance(response, HomePage):
+            return response.animation_frames
         return response.select("[id^='loading-x-anim']")
 
-    def get_2d_array(self, key_bytes: List[Union[float, int]], response, frames: bs4.ResultSet = None):
+    def get_2d_array(self, key_bytes: List[Union[float, int]], response, frames: List = None):
         if not frames:
             frames = self.get_frames(response)
-        return [[int(x) for x in re.sub(r"[^\d]+", " ", item).strip().split()] for item in list(list(frames[key_bytes[5] % 4].children)[0].children)[1].get("d")[9:].split("C")]
+        frame = frames[key_bytes[5] % 4]
+        if not isinstance(frame, str):
+            frame = list(list(frame.children)[0].children)[1].get("d")
+        return [[int(x) for x in re.sub(r"[^\d]+", " ", item).strip().split()] for item in frame[9:].split("C")]
 
     def solve(self, value, min_val, max_val, rounding: bool):
         result = value * (max_val-min_val) / 255 + min_val
@@ -190,23 +414,35 @@ class TransactionGenerator:
         animation_key = self.animate(frame_row, target_time)
         return animation_key
 
+    def _get_key_state(self, key, animation_key):
+        state = self._key_states.get((key, animation_key))
+
+        if state is None:
+            # Only method, path and time change between the calls, everything else is computed once per key
+            key_bytes = base64.b64decode(bytes(key, 'utf-8'))
+            suffix = f"{self.DEFAULT_KEYWORD}{animation_key}".encode()
+            trailer = bytes((self.ADDITIONAL_RANDOM_NUMBER,))
+            state = self._key_states[(key, animation_key)] = (key_bytes, suffix, trailer)
+
+        return state
+
     def generate_transaction_id(self, method: str, path: str, response=None, key=None, animation_key=None, time_now=None):
         try:
             time_now = time_now or math.floor(
                 (time.time() * 1000 - 1682924400 * 1000) / 1000)
-            time_now_bytes = [(time_now >> (i * 8)) & 0xFF for i in range(4)]
             key = key or self.key or self.get_key(response)
-            key_bytes = self.get_key_bytes(key)
             animation_key = animation_key or self.animation_key or self.get_animation_key(
-                key_bytes, response)
-            hash_val = hashlib.sha256(
-                f"{method}!{path}!{time_now}{self.DEFAULT_KEYWORD}{animation_key}".encode()).digest()
-            hash_bytes = list(hash_val)
+                self.get_key_bytes(key), response)
+            key_bytes, suffix, trailer = self._get_key_state(key, animation_key)
+            hash_val = hashlib.sha256(f"{method}!{path}!{time_now}".encode() + suffix).digest()
             random_num = random.randint(0, 255)
-            bytes_arr = [*key_bytes, *time_now_bytes, *
-                         hash_bytes[:16], self.ADDITIONAL_RANDOM_NUMBER]
-            out = bytearray(
-                [random_num, *[item ^ random_num for item in bytes_arr]])
+            bytes_arr = b"".join((
+                key_bytes,
+                (time_now & 0xFFFFFFFF).to_bytes(4, "little"),
+                hash_val[:16],
+                trailer
+            ))
+            out = bytes((random_num,)) + bytes_arr.translate(XOR_TABLES[random_num])
             return base64_encode(out).strip("=")
         except Exception as error:
             raise Exception(f"Couldn't generate transaction ID.\n{error}")
@@ -1,7 +1,10 @@
 import asyncio
+import time
 from tweety.types import ShortUser
 from .twDataTypes import User, Tweet
 from ..utils import find_objects, parse_wait_time
+from ..metrics import REQUEST_TIME
+from ..tracing import NULL_SPAN_CONTEXT
 
 
 class BaseGeneratorClass(dict):
@@ -33,7 +36,7 @@ class BaseGeneratorClass(dict):
 
         cursor = cursor if cursor != 0 else self.cursor
 
-        results, cursor, cursor_top = await self.get_page(cursor)
+        results, cursor, cursor_top = await self._get_timed_page(cursor)
         self.is_next_page = self._has_next_page(cursor)
         self.cursor, self.cursor_top = cursor, cursor_top
         _result_attr = self._RESULT_ATTR
@@ -41,6 +44,13 @@ class BaseGeneratorClass(dict):
         self[_result_attr] = getattr(self, _result_attr)
         self['cursor'], self['cursor_top'], self['is_next_page'] = self.cursor, self.cursor_top, self.is_next_page
 
+        tracing = getattr(self.client.http, "tracing", None)
+        with tracing.span("tweety.page.cache_users", parser=self.__class__.__name__) if tracing else NULL_SPAN_CONTEXT:
+            self._cache_users(results)
+
+        return results
+
+    def _cache_users(self, results):
         for result in results:
             if isinstance(result, (User, ShortUser)):
                 self.client._cached_users[str(result.username).lower()] = result.id
@@ -53,7 +63,31 @@ class BaseGeneratorClass(dict):
                 if result.is_retweet and result.retweeted_tweet:
                     self.client._cached_users[str(result.retweeted_tweet.author.username).lower()] = result.retweeted_tweet.author.id
 
-        return results
+    async def _get_timed_page(self, cursor):
+        # Time spent waiting for the API is excluded, what remains is building the objects of the page
+        request_time = [0.0]
+        token = REQUEST_TIME.set(request_time)
+        tracing = getattr(self.client.http, "tracing", None)
+        started = time.perf_counter()
+
+        try:
+            # Requests of the page show up as child spans, the rest of the page span is parsing
+            with tracing.span("tweety.page", parser=self.__class__.__name__) if tracing else NULL_SPAN_CONTEXT as span:
+                page = await self.get_page(cursor)
+                parse_time = max(time.perf_counter() - started - request_time[0], 0.0)
+
+                if span is not None:
+                    span.set_attribute("fetch_time", request_time[0])
+                    span.set_attribute("parse_time", parse_time)
+                    span.set_attribute("results", len(page[0]))
+        finally:
+            REQUEST_TIME.reset(token)
+
+        metrics = getattr(self.client.http, "metrics", None)
+        if metrics is not None:
+            metrics.record_parse(self.__class__.__name__, parse_time, len(page[0]))
+
+        return page
 
     async def generator(self):
         this_page = 0
@@ -1,8 +1,9 @@
+import asyncio
+import contextlib
 import datetime
+import mmap
 import os
-import time
 from http.cookiejar import MozillaCookieJar
-from httpx._content import encode_multipart_data
 from io import BytesIO
 from .. import constants
 from . import Gif
@@ -138,8 +139,52 @@ class Cookies:
         return string
 
 
+class MultipartSegment:
+    """
+    Multipart body of an upload segment streamed from a view of the media without joining it into a new buffer.
+    Every iteration streams the body again, so the request can be retried
+    """
+
+    WRITE_SIZE = 64 * 1024
+
+    def __init__(self, data, boundary, name="media", filename="blob", content_type="application/octet-stream"):
+        """
+        :param data: (`memoryview`) Content of the segment
+        :param boundary: (`bytes`) Boundary of the multipart body
+        """
+
+        self._data = data
+        self.boundary = boundary
+        self._head = b"".join([
+            b"--", boundary, b"\r\n",
+            f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'.encode(),
+            f"Content-Type: {content_type}\r\n\r\n".encode()
+        ])
+        self._tail = b"".join([b"\r\n--", boundary, b"--\r\n"])
+
+    @property
+    def content_type(self):
+        return "multipart/form-data; boundary={}".format(self.boundary.decode("ascii"))
+
+    def get_content_length(self):
+        return len(self._head) + self._data.nbytes + len(self._tail)
+
+    def __aiter__(self):
+        return self._iter_chunks()
+
+    async def _iter_chunks(self):
+        yield self._head
+
+        # Transports take bytes, only one small write at a time is copied
+        for start in range(0, self._data.nbytes, self.WRITE_SIZE):
+            yield bytes(self._data[start:start + self.WRITE_SIZE])
+
+        yield self._tail
+
+
 class UploadedMedia:
     FILE_CHUNK_SIZE = 2 * 1024 * 1024  # 2 mb
+    APPEND_WINDOW = 1
 
     def __init__(
             self,
@@ -147,9 +192,11 @@ class UploadedMedia:
             client,
             alt_text=None,
             sensitive_media_warning=None,
-            media_category=constants.UPLOAD_TYPE_TWEET_IMAGE
+            media_category=constants.UPLOAD_TYPE_TWEET_IMAGE,
+            append_window=None
     ):
         self.media_id = None
+        self.append_window = max(int(append_window or self.APPEND_WINDOW), 1)
         self._file = file_path
         self._client = client
         self._alt_text = alt_text
@@ -185,8 +232,8 @@ class UploadedMedia:
         elif isinstance(self._file, bytes):
             return len(self._file)
         elif isinstance(self._file, BytesIO):
-            self._file = self._file.getvalue()
-            return len(self._file)
+            with self._file.getbuffer() as view:
+                return view.nbytes
         elif isinstance(self._file, Gif):
             self._file = self._source_url
         return 0
@@ -216,25 +263,55 @@ class UploadedMedia:
             return {"transfer-encoding": "chunked", "content-type": content_type}
         return {"content-length": str(content_length), "content-type": content_type}
 
+    @contextlib.contextmanager
+    def _get_media_view(self):
+        """
+        Read-only view of the whole media, files are memory mapped instead of read
+        """
+
+        if isinstance(self._file, (bytes, bytearray)):
+            view = memoryview(self._file)
+        elif isinstance(self._file, BytesIO):
+            view = self._file.getbuffer()
+        else:
+            with open(self._file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as view:
+                    yield view
+            return
+
+        with view:
+            yield view
+
     async def _append_upload(self, media_id):
         segments, remainder = divmod(self.size, self.FILE_CHUNK_SIZE)
         segments += bool(remainder)
 
-        if isinstance(self._file, bytes):
-            data_bytes = self._file
-        else:
-            with open(self._file, "rb") as f:
-                data_bytes = f.read()
-
-        for segment_index in range(segments):
-            start = segment_index * self.FILE_CHUNK_SIZE
-            end = start + self.FILE_CHUNK_SIZE
-            this_chunk = data_bytes[start:end]
-            boundary = self._create_boundary()
-            _, multipart = encode_multipart_data({}, {"media": ('blob', this_chunk, "application/octet-stream")}, boundary)
-            headers = self.get_multipart_headers(multipart)
-            headers.update({"x-media-type": self.mime_type})
-            await self._client.http.upload_media_append(media_id, b"".join([i for i in multipart.iter_chunks()]), headers, segment_index)
+        window = asyncio.Semaphore(self.append_window)
+
+        with self._get_media_view() as media_view:
+            async def append_segment(segment_index):
+                start = segment_index * self.FILE_CHUNK_SIZE
+                end = start + self.FILE_CHUNK_SIZE
+
+                async with window:
+                    # Slice of the view, the segment isn't copied
+                    with media_view[start:end] as this_chunk:
+                        multipart = MultipartSegment(this_chunk, self._create_boundary())
+                        headers = self.get_multipart_headers(multipart)
+                        headers.update({"x-media-type": self.mime_type})
+                        await self._client.http.upload_media_append(media_id, multipart, headers, segment_index)
+
+            # Segments carry their index, so they can be appended in any order
+            tasks = [asyncio.ensure_future(append_segment(segment_index)) for segment_index in range(segments)]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+
+                # Every slice has to be released before the view is
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
 
     async def set_metadata(self):
         await self._client.http.set_media_set_metadata(self.media_id, self._alt_text, self._sensitive_media_warning)
@@ -258,7 +335,7 @@ class UploadedMedia:
             processing_info = response['processing_info']
 
             if processing_info.get('state') in ('pending', 'in_progress') and 'error' not in processing_info:
-                time.sleep(processing_info['check_after_secs'])
+                await asyncio.sleep(processing_info['check_after_secs'])
                 response = await self._client.http.upload_media_status(self.media_id)
             elif processing_info.get("error"):
                 error = processing_info["error"]
@@ -1,11 +1,9 @@
+import asyncio
 import json
 import os.path
 import html
 import warnings
 from typing import Callable, Union
-from dateutil import parser
-import openpyxl
-import dateutil
 from ..constants import MEDIA_TYPE_VIDEO, MEDIA_TYPE_GIF, MEDIA_TYPE_IMAGE
 from ..exceptions import UserNotFound, UserProtected, ProtectedTweet
 from ..filters import TweetCommentFilters
@@ -47,6 +45,8 @@ class Excel:
         self._write_data()
 
     def _get_sheet(self):
+        import openpyxl
+
         if self._append and self.filename:
             self.workbook = openpyxl.load_workbook(self.filename)
             self.worksheet = self.workbook.active
@@ -191,12 +191,8 @@ class Tweet(_TwType):
         return await self._client.delete_tweet(self.id)
 
     async def download_all_media(self, progress_callback=None):
-        filenames = []
-        for media in self.media:
-            filename = await media.download(progress_callback=progress_callback)
-            filenames.append(filename)
-
-        return filenames
+        # Downloads share the media slots of the client, so they can run together
+        return list(await asyncio.gather(*[media.download(progress_callback=progress_callback) for media in self.media]))
 
     def get_threads(self):
         _threads = []
@@ -433,7 +429,8 @@ class Tweet(_TwType):
         date = self._original_tweet.get("created_at")
 
         if date:
-            return dateutil.parser.parse(date)
+            from dateutil import parser
+            return parser.parse(date)
 
         return None
 
@@ -891,6 +888,7 @@ class Media(_TwType):
         self.source_user = self._get_source_user()
         self.tagged_users = self.tags = [ShortUser(self._client, i) for i in find_objects(self.features, "tags", None, none_value=[])]
         self.streams = []
+        self.hls_url = None
 
         if self.type in (MEDIA_TYPE_VIDEO, MEDIA_TYPE_GIF):
             self._parse_video_streams()
@@ -920,6 +918,8 @@ class Media(_TwType):
         for i in videoDict.get("variants"):
             if not i.get("content_type").split("/")[-1] == "x-mpegURL":
                 self.streams.append(Stream(self._client, i, videoDict.get("duration_millis", 0), videoDict.get("aspect_ratio")))
+            else:
+                self.hls_url = i.get("url")
 
     async def best_stream(self):
         if self.type == MEDIA_TYPE_IMAGE:
@@ -951,6 +951,35 @@ class Media(_TwType):
 
         return await self._client.http.download_media(url, filename, progress_callback)
 
+    async def download_stream(
+            self,
+            filename: str = None,
+            rendition="best",
+            audio=True,
+            audio_filename: str = None,
+            progress_callback: Callable[[str, int, int], None] = None,
+            downloader=None
+    ):
+        """
+        Download the HLS stream of the video instead of a single mp4 variant
+
+        :param filename: (`str`) Path of the output file
+        :param rendition: (`str`, `int`, `Callable`) Variant of the stream (`best`, `worst` or maximum bandwidth)
+        :param audio: (`bool`) Download the separate audio rendition of the variant too
+        :param audio_filename: (`str`) Path of the separate audio, defaults to the name of the video with `.audio` before its extension
+        :param progress_callback: (`Callable[[str, int, int], None]`) Called with filename, segments listed and segments written
+        :param downloader: (`HLSDownloader`) Downloader to use
+        :return: str (filename), or tuple[str, str] (video and audio filenames) if the audio is separate
+        """
+
+        if not self.hls_url:
+            raise ValueError("No HLS Stream found")
+
+        return await self._client.http.download_stream(
+            self.hls_url, filename, rendition=rendition, audio=audio, audio_filename=audio_filename,
+            progress_callback=progress_callback, downloader=downloader
+        )
+
     def _get_source_user(self):
         source_user = find_objects(self._raw, "source_user", None, recursive=False)
         if not source_user:
@@ -1131,6 +1160,13 @@ class Broadcast(_TwType):
     async def get_stream_link(self):
         return await self._client.get_stream(self.media_key)
 
+    async def download(self, filename: str = None, live=None, max_duration=None, progress_callback: Callable[[str, int, int], None] = None, downloader=None, audio_filename: str = None):
+        stream = await self.get_stream_link()
+        return await stream.download(
+            filename, live=live, max_duration=max_duration, progress_callback=progress_callback, downloader=downloader,
+            audio_filename=audio_filename
+        )
+
     def __repr__(self):
         return "Broadcast(id={}, title={}, state={}, broadcaster_username={})".format(
             self.id, self.title, self.state, self.broadcaster_username
@@ -1513,6 +1549,13 @@ class AudioSpace(_TwType):
     async def get_stream_link(self):
         return await self._client.get_stream(self.media_key)
 
+    async def download(self, filename: str = None, live=None, max_duration=None, progress_callback: Callable[[str, int, int], None] = None, downloader=None, audio_filename: str = None):
+        stream = await self.get_stream_link()
+        return await stream.download(
+            filename, live=live, max_duration=max_duration, progress_callback=progress_callback, downloader=downloader,
+            audio_filename=audio_filename
+        )
+
     def __repr__(self):
         return "AudioSpace(id={}, title={}, state={}, tweet={})".format(
             self.id, self.title, self.state, self.tweet
@@ -1531,6 +1574,39 @@ class LiveStreamPayload(_TwType):
         self.lifecycle_token = self._raw.get("lifecycleToken")
         self.share_url = self._raw.get("shareUrl")
 
+    async def download(
+            self,
+            filename: str = None,
+            rendition="best",
+            live=None,
+            max_duration=None,
+            progress_callback: Callable[[str, int, int], None] = None,
+            downloader=None,
+            audio=True,
+            audio_filename: str = None
+    ):
+        """
+        Download the stream, a live one is recorded until it ends
+
+        :param filename: (`str`) Path of the output file
+        :param rendition: (`str`, `int`, `Callable`) Variant of the stream (`best`, `worst` or maximum bandwidth)
+        :param live: (`bool`) Keep recording while the stream is live
+        :param max_duration: (`float`) Stop recording a live stream after these many seconds
+        :param progress_callback: (`Callable[[str, int, int], None]`) Called with filename, segments listed and segments written
+        :param downloader: (`HLSDownloader`) Downloader to use, call its `stop` to end a recording
+        :param audio: (`bool`) Download the separate audio rendition of the variant too
+        :param audio_filename: (`str`) Path of the separate audio, defaults to the name of the video with `.audio` before its extension
+        :return: str (filename), or tuple[str, str] (video and audio filenames) if the audio is separate
+        """
+
+        if not self.direct_url:
+            raise ValueError("No Stream URL found")
+
+        return await self._client.http.download_stream(
+            self.direct_url, filename, rendition=rendition, live=live, max_duration=max_duration,
+            progress_callback=progress_callback, downloader=downloader, audio=audio, audio_filename=audio_filename
+        )
+
     def __repr__(self):
         return "LiveStreamPayload(status={}, type={}, session_id={})".format(
             self.status, self.type, self.session_id
@@ -1,3 +1,4 @@
+import asyncio
 import datetime
 from typing import Union, Tuple, List
 from .exceptions import ListNotFound, ConversationNotFound
@@ -26,6 +27,10 @@ class UserMethods:
     def rate_limits(self):
         return self.http._limits
 
+    @property
+    def metrics(self):
+        return self.http.metrics
+
     async def get_conversation_id(self, conversation_id, is_group=False):
         if isinstance(conversation_id, Conversation):
             return conversation_id.id
@@ -1359,25 +1364,25 @@ class UserMethods:
     async def upload_media(
             self,
             files=Union[str, List[Union[str, tuple]]],
-            upload_type=constants.UPLOAD_TYPE_TWEET_IMAGE
+            upload_type=constants.UPLOAD_TYPE_TWEET_IMAGE,
+            append_window=None
     ):
         """
             Upload a file to Twitter
 
         :param files: List of files to upload
         :param upload_type: Type of Upload ("tweet_image", "dm_image")
+        :param append_window: (`int`) Segments of a file uploaded at once
         :return: List[UploadedMedia]
         """
 
-        return await self._upload_media(files, upload_type)
+        return await self._upload_media(files, upload_type, append_window)
 
-    async def _upload_media(self, files, _type=constants.UPLOAD_TYPE_TWEET_IMAGE):
+    async def _upload_media(self, files, _type=constants.UPLOAD_TYPE_TWEET_IMAGE, append_window=None):
         if not isinstance(files, constants.ITERABLE_TYPES):
             files = [files]
 
-        uploaded = []
-
-        for file in files:
+        async def upload(file):
             if isinstance(file, constants.ITERABLE_TYPES):
                 file_path = file[0]
                 alt_text = file[1]
@@ -1387,18 +1392,27 @@ class UserMethods:
 
             if isinstance(file_path, UploadedMedia):
                 if file_path.media_id is None:
-                    uploaded.append(await file_path.upload())
-                else:
-                    uploaded.append(file_path)
-            else:
-                file = UploadedMedia(
-                    file_path,
-                    self,
-                    alt_text,
-                    None,
-                    _type
-                )
-                await file.upload()
-                uploaded.append(file)
-
-        return uploaded
+                    return await file_path.upload()
+
+                return file_path
+
+            file = UploadedMedia(
+                file_path,
+                self,
+                alt_text,
+                None,
+                _type,
+                append_window=append_window
+            )
+            return await file.upload()
+
+        # Files are uploaded (and processed) together, in the order they were given
+        tasks = [asyncio.ensure_future(upload(file)) for file in files]
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
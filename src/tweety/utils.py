@@ -11,7 +11,6 @@ import uuid
 import warnings
 from functools import wraps
 from io import BytesIO
-from dateutil import parser as date_parser
 from urllib.parse import urlparse, parse_qs
 from .exceptions import AuthenticationRequired
 from .filters import Language
@@ -40,6 +39,9 @@ WORKBOOK_HEADERS = ['Date', 'Author', 'id', 'text', 'is_retweet', 'is_reply', 'l
                     'retweet_count', 'source', 'medias', 'user_mentioned', 'urls', 'hashtags', 'symbols']
 
 SENSITIVE_MEDIA_TAGS = ['adult_content', 'graphic_violence', 'other']
+JSON_DECODERS = ("orjson", "msgspec", "simdjson", "json")
+_json_loads = None
+
 def Warn(text, category=DeprecationWarning):
     this_text = text
     this_category = category
@@ -65,6 +67,7 @@ def DictRequestData(cls):
 
     def method_wrapper_decorator(func):
         request_keys = ["method", "url", "params", "json", "data"]
+        endpoint_name = func.__name__
 
         def wrapper(self, *args, **kwargs):
             request_data = func(self, *args, **kwargs)
@@ -73,6 +76,8 @@ def DictRequestData(cls):
             for index, data in enumerate(request_data):
                 this_key = request_keys[index]
                 request[this_key] = data
+
+            request["endpoint"] = get_endpoint_name(request.get("url"), endpoint_name)
             return request
 
         return wrapper
@@ -85,8 +90,17 @@ def DictRequestData(cls):
     return method_wrapper_decorator(cls)
 
 
+def get_endpoint_name(url, default=None):
+    # GraphQL urls end with the operation name i.e `/graphql/<query_id>/<OperationName>`
+    if url and "/graphql/" in url:
+        return url.split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1]
+
+    return default or (urlparse(url).path if url else None)
+
+
 def AuthRequired(cls):
     def method_async_wrapper_decorator(func):
+        @wraps(func)
         async def wrapper(self, *args, **kwargs):
             if self.me is None:
                 raise AuthenticationRequired(200, "GenericForbidden", None)
@@ -95,6 +109,7 @@ def AuthRequired(cls):
         return wrapper
 
     def method_wrapper_decorator(func):
+        @wraps(func)
         def wrapper(self, *args, **kwargs):
             if self.me is None:
                 raise AuthenticationRequired(200, "GenericForbidden", None)
@@ -241,11 +256,79 @@ def get_next_index(iterable, current_index, __default__=None):
         return __default__
 
 
+def get_json_decoder(decoder=None):
+    """
+    Get the `loads` function of a JSON library
+
+    :param decoder: (`str`, `callable`) One of `JSON_DECODERS` or a function accepting bytes,
+                    if `None` the fastest installed library is used
+    :return: callable
+    """
+
+    if callable(decoder):
+        return decoder
+
+    for name in ([decoder] if decoder else JSON_DECODERS):
+        try:
+            if name == "orjson":
+                import orjson
+                return orjson.loads
+            elif name == "msgspec":
+                import msgspec
+                return msgspec.json.Decoder().decode
+            elif name == "simdjson":
+                import simdjson
+                return simdjson.loads
+            elif name == "json":
+                return json.loads
+            else:
+                raise ValueError(f"Unknown JSON decoder '{name}', use any of {JSON_DECODERS}")
+        except ImportError:
+            if decoder:
+                raise
+
+    return json.loads
+
+
+def set_json_decoder(decoder=None):
+    """
+    Set the JSON library used to decode the responses
+
+    :param decoder: (`str`, `callable`) Same as `get_json_decoder`
+    :return: callable
+    """
+
+    global _json_loads
+    _json_loads = get_json_decoder(decoder)
+    return _json_loads
+
+
+def json_loads(content):
+    if _json_loads is None:
+        set_json_decoder()
+
+    return _json_loads(content)
+
+
 def custom_json(self, **kwargs):
+    if kwargs:
+        try:
+            return json.loads(self.content, **kwargs)
+        except:
+            return None
+
+    # Body is decoded only once per response, no matter how many times it is accessed
+    try:
+        return self._decoded_json
+    except AttributeError:
+        pass
+
     try:
-        return json.loads(self.content, **kwargs)
+        self._decoded_json = json_loads(self.content) if self.content else None
     except:
-        return None
+        self._decoded_json = None
+
+    return self._decoded_json
 
 
 def create_request_id():
@@ -273,8 +356,9 @@ def check_if_file_is_supported(file):
         file = file
         file_mime = mime_from_buffer(file)
     elif isinstance(file, BytesIO):
-        file = file.getvalue()
-        file_mime = mime_from_buffer(file)
+        # Header is enough to detect the type, the buffer isn't copied
+        with file.getbuffer() as view:
+            file_mime = mime_from_buffer(bytes(view[:4096]))
     elif str(file.__class__.__name__) == "Gif":
         file_extension = "gif"
         file_mime = MIME_TYPES.get(file_extension)
@@ -298,11 +382,14 @@ def calculate_md5(file_path):
         return None
 
     md5_hash = hashlib.md5()
-    if isinstance(file_path, bytes):
+    if isinstance(file_path, (bytes, bytearray, memoryview)):
         md5_hash.update(file_path)
+    elif isinstance(file_path, BytesIO):
+        with file_path.getbuffer() as view:
+            md5_hash.update(view)
     else:
         with open(file_path, "rb") as file:
-            for chunk in iter(lambda: file.read(4096), b""):
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
                 md5_hash.update(chunk)
     return md5_hash.hexdigest()
 
@@ -390,6 +477,7 @@ def parse_time(time):
         except (OSError, ValueError):
             return datetime.datetime.fromtimestamp(int(time) / 1000)
 
+    from dateutil import parser as date_parser
     return date_parser.parse(time)
 
 